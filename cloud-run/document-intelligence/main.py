@@ -11,15 +11,27 @@ Architecture:
 
 import os
 import io
+import re
+import asyncio
 import uuid
 import time
 import json
 import base64
+import hashlib
 import tempfile
+import multiprocessing
+import threading
 import requests
-from typing import Optional, Dict, Any, List
-from flask import Flask, request, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Union
+import orjson
+from flask import Flask, request
 from flask_cors import CORS
+from flask_compress import Compress
 
 import google.auth
 from google.auth.transport.requests import Request as GoogleAuthRequest
@@ -28,8 +40,10 @@ from google.auth.transport.requests import Request as GoogleAuthRequest
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
 import fitz  # PyMuPDF for PDF
-from PIL import Image
+from charset_normalizer import from_bytes
+from charset_normalizer.md import mess_ratio
 
 # Google Cloud
 from google.cloud import documentai_v1 as documentai
@@ -38,6 +52,12 @@ from google.cloud import vision
 app = Flask(__name__)
 CORS(app)
 
+# /extract responses inline page thumbnails and full text (often 1-5MB);
+# compress them when the client accepts it.
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
+
 # Configuration
 GOOGLE_PROJECT_ID = (
     os.environ.get('GOOGLE_PROJECT_ID')
@@ -53,13 +73,58 @@ VERTEX_LOCATION = os.environ.get('VERTEX_LOCATION', os.environ.get('GOOGLE_CLOUD
 VERTEX_GEMINI_OCR_ENABLED = os.environ.get('VERTEX_GEMINI_OCR_ENABLED', 'false').lower() in ['1', 'true', 'yes']
 VERTEX_GEMINI_MODEL = os.environ.get('VERTEX_GEMINI_MODEL', 'gemini-1.5-pro')
 
+# Shared HTTP session: keep-alive connection pooling for signed-URL downloads and
+# the Vertex/OpenAI OCR fallbacks, with exponential backoff on 429/5xx.
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False,
+    ),
+))
+
+# Google Cloud clients are expensive to build (gRPC channels, credentials, DNS),
+# so they are created on first use and shared across requests.
+_vision_client = None
+_docai_client = None
+_vertex_credentials = None
+
+
+def _get_vision_client() -> vision.ImageAnnotatorClient:
+    global _vision_client
+    if _vision_client is None:
+        _vision_client = vision.ImageAnnotatorClient()
+    return _vision_client
+
+
+def _get_docai_client() -> documentai.DocumentProcessorServiceClient:
+    global _docai_client
+    if _docai_client is None:
+        _docai_client = documentai.DocumentProcessorServiceClient()
+    return _docai_client
+
+
+def _get_vertex_token() -> Optional[str]:
+    """Return a cloud-platform OAuth token, refreshing only when it has expired."""
+    global _vertex_credentials
+    if _vertex_credentials is None:
+        _vertex_credentials, _ = google.auth.default(scopes=['https://www.googleapis.com/auth/cloud-platform'])
+    if not _vertex_credentials.valid:
+        _vertex_credentials.refresh(GoogleAuthRequest())
+    return _vertex_credentials.token
+
 # =============================================================================
 # HEALTH CHECK
 # =============================================================================
 
 @app.route('/', methods=['GET'])
 def index():
-    return jsonify({
+    return json_response({
         'service': 'MindSparkle Document Intelligence',
         'version': '2.0.0',
         'status': 'healthy',
@@ -80,7 +145,7 @@ def index():
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'healthy', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ')})
+    return json_response({'status': 'healthy', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ')})
 
 # =============================================================================
 # EXTRACT ENDPOINT
@@ -90,6 +155,7 @@ def health():
 def extract():
     start_time = time.time()
     request_id = str(uuid.uuid4())[:8]
+    file_path = None  # signed-URL downloads are streamed to disk, not buffered
     
     try:
         # Get file from request
@@ -101,9 +167,10 @@ def extract():
         if 'file' in request.files:
             file = request.files['file']
             file_buffer = file.read()
+            file_size = len(file_buffer)
             filename = file.filename or 'document'
             mimetype = file.content_type or ''
-            print(f"[{request_id}] Received file upload: {filename} ({len(file_buffer)} bytes)")
+            print(f"[{request_id}] Received file upload: {filename} ({file_size} bytes)")
         
         # Check for signed URL in JSON body
         elif request.is_json and request.json.get('signedUrl'):
@@ -113,21 +180,25 @@ def extract():
             mimetype = data.get('mimeType', '')
             
             print(f"[{request_id}] Downloading from signed URL: {filename}")
-            response = requests.get(signed_url, timeout=300)
-            response.raise_for_status()
-            file_buffer = response.content
-            print(f"[{request_id}] Downloaded {len(file_buffer)} bytes")
+            file_path = download_to_tempfile(signed_url, filename)
+            file_size = os.path.getsize(file_path)
+            print(f"[{request_id}] Downloaded {file_size} bytes")
         
         else:
-            return jsonify({'error': 'No file provided'}), 400
+            return json_response({'error': 'No file provided'}, 400)
         
         # Detect file type
         file_type = detect_file_type(filename, mimetype)
         print(f"[{request_id}] Extracting {file_type}: {filename}")
         
+        # PyMuPDF opens the downloaded file directly; other extractors take bytes
+        if file_path and file_type != 'pdf':
+            with open(file_path, 'rb') as f:
+                file_buffer = f.read()
+        
         # Extract based on type
         if file_type == 'pdf':
-            result = extract_pdf(file_buffer, request_id)
+            result = extract_pdf(file_buffer, request_id, file_path=file_path)
         elif file_type in ['pptx', 'ppt']:
             result = extract_pptx(file_buffer, request_id)
         elif file_type in ['docx', 'doc']:
@@ -135,15 +206,15 @@ def extract():
         elif file_type == 'txt':
             result = extract_txt(file_buffer, request_id)
         else:
-            return jsonify({'error': f'Unsupported file type: {file_type}'}), 400
+            return json_response({'error': f'Unsupported file type: {file_type}'}, 400)
         
         # Build canonical model
-        canonical = build_canonical_model(result, filename, file_type, len(file_buffer), request_id)
+        canonical = build_canonical_model(result, filename, file_type, file_size, request_id)
         
         processing_time = int((time.time() - start_time) * 1000)
         print(f"[{request_id}] Extraction complete in {processing_time}ms")
         
-        return jsonify({
+        return json_response({
             'success': True,
             'requestId': request_id,
             'processingTime': processing_time,
@@ -151,7 +222,7 @@ def extract():
             'metadata': {
                 'filename': filename,
                 'fileType': file_type,
-                'fileSize': len(file_buffer),
+                'fileSize': file_size,
                 'extractionMethod': result.get('method', 'unknown'),
                 'confidence': result.get('confidence', 0)
             }
@@ -161,7 +232,11 @@ def extract():
         print(f"[{request_id}] Error: {str(e)}")
         import traceback
         traceback.print_exc()
-        return jsonify({'error': str(e), 'requestId': request_id}), 500
+        return json_response({'error': str(e), 'requestId': request_id}, 500)
+    
+    finally:
+        if file_path:
+            os.unlink(file_path)
 
 # =============================================================================
 # PDF EXTRACTION - Google Document AI → Adobe fallback → OCR
@@ -182,27 +257,143 @@ def _render_page_thumbnail_data_url(page, request_id: str) -> Optional[str]:
         else:
             scale = min(2.0, max(0.25, THUMBNAIL_MAX_WIDTH / page_width))
 
-        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
-        mode = "RGB" if pix.n >= 3 else "L"
-        img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
-        if mode != "RGB":
-            img = img.convert("RGB")
-
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=THUMBNAIL_JPEG_QUALITY, optimize=True)
-        b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csRGB, alpha=False)
+        # Encodes straight from the pixmap buffer in C (libjpeg-turbo in the wheels)
+        jpeg_bytes = pix.tobytes("jpg", jpg_quality=THUMBNAIL_JPEG_QUALITY)
+        b64 = base64.b64encode(jpeg_bytes).decode('utf-8')
         return f"data:image/jpeg;base64,{b64}"
     except Exception as e:
         print(f"[{request_id}] Thumbnail render failed: {e}")
         return None
 
-def extract_pdf(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
-    """Extract text from PDF using Document AI with fallbacks"""
+# Per-page PyMuPDF work is CPU-bound and holds the GIL, so large PDFs are
+# split into page ranges and scanned in a process pool.
+PDF_POOL_WORKERS = min(os.cpu_count() or 1, 4)
+PDF_POOL_MIN_PAGES = int(os.environ.get('PDF_POOL_MIN_PAGES', '3'))
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Lazily create the shared page-scan pool (spawned, so gRPC state is never forked)."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=PDF_POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pdf_pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (e.g. a child was OOM-killed) so the next PDF gets a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# get_text("dict") flags that skip image blocks, so text-heavy pages never copy out image bytes
+TEXT_ONLY_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Encoded image formats Vision accepts as-is; anything else is re-encoded as PNG
+VISION_IMAGE_EXTS = {'png', 'jpeg', 'jpg', 'gif', 'bmp', 'webp', 'tif', 'tiff'}
+
+
+def _scan_pdf_pages(doc, start: int, stop: int) -> List[tuple]:
+    """Scan pages [start, stop) of an open PDF.
+
+    Returns (page_num, page_text, page_images) per page. Text is read without
+    image data; only sparse pages (the ones whose images get OCR'd) are parsed a
+    second time with get_text("dict") defaults, which yields the encoded bytes of
+    every image drawn on the page.
+    """
+    results = []
+    for page_num in range(start, stop):
+        page = doc[page_num]
+        blocks = page.get_text("dict", flags=TEXT_ONLY_DICT_FLAGS)["blocks"]
+        page_text = "".join(
+            "".join(span["text"] for span in line["spans"]) + "\n"
+            for block in blocks if block["type"] == 0
+            for line in block["lines"]
+        ).strip()
+
+        page_images = []
+        if len(page_text) < 100:
+            seen = set()
+            for block in page.get_text("dict")["blocks"]:
+                if block["type"] != 1 or block["image"] in seen:
+                    continue
+                seen.add(block["image"])
+                try:
+                    if block["ext"] in VISION_IMAGE_EXTS and block["colorspace"] <= 3:
+                        page_images.append(block["image"])
+                    else:
+                        pix = fitz.Pixmap(block["image"])
+                        if pix.n - pix.alpha > 3:
+                            pix = fitz.Pixmap(fitz.csRGB, pix)
+                        page_images.append(pix.tobytes("png"))
+                except Exception:
+                    pass
+
+        results.append((page_num, page_text, page_images))
+    return results
+
+
+def _open_pdf(source: Union[bytes, str]):
+    """Open a PDF from bytes, or from a file path (memory-mapped by MuPDF)."""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _scan_pdf_page_range(source: Union[bytes, str], start: int, stop: int) -> List[tuple]:
+    """Process-pool entry point: fitz.Document is not picklable, so reopen from the source."""
+    doc = _open_pdf(source)
+    try:
+        return _scan_pdf_pages(doc, start, stop)
+    finally:
+        doc.close()
+
+
+def _scan_pdf(doc, source: Union[bytes, str], page_count: int, request_id: str) -> List[tuple]:
+    """Scan every page, fanning out to the process pool for multi-page PDFs."""
+    if page_count < PDF_POOL_MIN_PAGES or PDF_POOL_WORKERS < 2:
+        return _scan_pdf_pages(doc, 0, page_count)
+
+    chunk = -(-page_count // PDF_POOL_WORKERS)
+    pool = None
+    try:
+        pool = _get_pdf_pool()
+        futures = [
+            pool.submit(_scan_pdf_page_range, source, start, min(start + chunk, page_count))
+            for start in range(0, page_count, chunk)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool) and pool is not None:
+            _discard_pdf_pool(pool)
+        print(f"[{request_id}] Parallel page scan failed, scanning sequentially: {e}")
+        return _scan_pdf_pages(doc, 0, page_count)
+
+
+def extract_pdf(file_buffer: Optional[bytes], request_id: str, file_path: Optional[str] = None) -> Dict[str, Any]:
+    """Extract text from PDF using Document AI with fallbacks.
+
+    Pass file_path (with file_buffer=None) to let PyMuPDF open a file on disk
+    instead of holding the whole PDF in memory.
+    """
     
+    source = file_path or file_buffer
     text_blocks = []
     tables = []
     images = []
-    raw_text = ''
     method = 'unknown'
     confidence = 0.0
     page_count = 1
@@ -211,6 +402,9 @@ def extract_pdf(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
     if DOCUMENT_AI_PROCESSOR_ID:
         try:
             print(f"[{request_id}] Trying Google Document AI...")
+            if file_buffer is None:
+                with open(file_path, 'rb') as f:
+                    file_buffer = f.read()
             result = extract_pdf_with_document_ai(file_buffer, request_id)
             if result and result.get('confidence', 0) >= 0.7:
                 print(f"[{request_id}] Document AI success: {result.get('confidence', 0)*100:.0f}% confidence")
@@ -220,96 +414,98 @@ def extract_pdf(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
         except Exception as e:
             print(f"[{request_id}] Document AI failed: {e}")
     
-    # Fallback to PyMuPDF (local extraction)
+    # Fallback to PyMuPDF (local extraction). The document stays open for the
+    # full-page OCR pass so it's only parsed once.
+    doc = None
     try:
         print(f"[{request_id}] Using PyMuPDF extraction...")
-        doc = fitz.open(stream=file_buffer, filetype="pdf")
+        doc = _open_pdf(source)
         page_count = doc.page_count or 1
         thumbnails_added = 0
         
-        for page_num, page in enumerate(doc):
-            page_text = page.get_text("text")
-            if page_text.strip():
+        pages = _scan_pdf(doc, source, doc.page_count, request_id)
+
+        # OCR embedded images of sparse pages concurrently, then splice back in page order
+        ocr_results = iter(ocr_images([image for page in pages for image in page[2]], request_id))
+
+        for page_num, page_text, page_images in pages:
+            # Whether any block of this page carries meaningful text (tracked as we go
+            # instead of rescanning every block extracted so far)
+            has_page_text = len(page_text) >= 20
+            
+            if page_text:
                 text_blocks.append({
-                    'text': page_text.strip(),
+                    'text': page_text,
                     'page': page_num + 1,
                     'confidence': 0.85,
                     'type': 'paragraph'
                 })
             
-            # Extract images for OCR if text is sparse
-            if len(page_text.strip()) < 100:
-                for img_index, img in enumerate(page.get_images()):
-                    try:
-                        xref = img[0]
-                        pix = fitz.Pixmap(doc, xref)
-                        if pix.n - pix.alpha > 3:
-                            pix = fitz.Pixmap(fitz.csRGB, pix)
-                        img_data = pix.tobytes("png")
-                        
-                        # OCR the image
-                        ocr_text = ocr_image(img_data, request_id)
-                        if ocr_text:
-                            text_blocks.append({
-                                'text': ocr_text,
-                                'page': page_num + 1,
-                                'confidence': 0.7,
-                                'type': 'ocr'
-                            })
-                    except:
-                        pass
+            for _ in page_images:
+                ocr_text = next(ocr_results)
+                if ocr_text:
+                    text_blocks.append({
+                        'text': ocr_text,
+                        'page': page_num + 1,
+                        'confidence': 0.7,
+                        'type': 'ocr'
+                    })
+                    has_page_text = has_page_text or len(ocr_text.strip()) >= 20
 
-            # If we still have no meaningful text for this page, attach a thumbnail
-            if thumbnails_added < MAX_PAGE_THUMBNAILS:
-                try:
-                    # Determine if any block exists for this page
-                    has_page_text = any(
-                        (b.get('page') == page_num + 1 and len(str(b.get('text', '')).strip()) >= 20)
-                        for b in text_blocks
-                    )
-                    if not has_page_text:
-                        data_url = _render_page_thumbnail_data_url(page, request_id)
-                        if data_url:
-                            images.append({
-                                'page': page_num + 1,
-                                'type': 'page_thumbnail',
-                                'data_url': data_url,
-                                'caption': 'Page thumbnail (no text extracted)'
-                            })
-                            thumbnails_added += 1
-                except Exception:
-                    pass
-        
-        doc.close()
+            # If we still have no meaningful text for this page (after OCR), attach a
+            # thumbnail; rendering waits until now so pages OCR fills in don't use up
+            # the budget
+            if not has_page_text and thumbnails_added < MAX_PAGE_THUMBNAILS:
+                thumbnail = _render_page_thumbnail_data_url(doc[page_num], request_id)
+                if thumbnail:
+                    images.append({
+                        'page': page_num + 1,
+                        'type': 'page_thumbnail',
+                        'data_url': thumbnail,
+                        'caption': 'Page thumbnail (no text extracted)'
+                    })
+                    thumbnails_added += 1
         
-        raw_text = '\n\n'.join([b['text'] for b in text_blocks])
-        confidence = 0.85 if raw_text else 0.0
+        # Length of the joined text (blocks + '\n\n' separators), without joining
+        # it yet: the OCR fallback below may still add blocks
+        text_len = sum(len(b['text']) for b in text_blocks) + 2 * max(len(text_blocks) - 1, 0)
+        confidence = 0.85 if text_len else 0.0
         method = 'pymupdf'
         
         # If still no text, try full page OCR
-        if len(raw_text) < 100:
+        if text_len < 100:
             print(f"[{request_id}] Low text extraction, trying full page OCR...")
-            doc = fitz.open(stream=file_buffer, filetype="pdf")
-            page_count = doc.page_count or page_count
-            for page_num, page in enumerate(doc):
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                img_data = pix.tobytes("png")
-                ocr_text = ocr_image(img_data, request_id)
-                if ocr_text:
-                    text_blocks.append({
-                        'text': ocr_text,
-                        'page': page_num + 1,
-                        'confidence': 0.6,
-                        'type': 'page_ocr'
-                    })
-            doc.close()
-            raw_text = '\n\n'.join([b['text'] for b in text_blocks])
+            # Render a window of pages at a time so rasters don't pile up in memory
+            for start in range(0, doc.page_count, OCR_CONCURRENCY):
+                window = range(start, min(start + OCR_CONCURRENCY, doc.page_count))
+                # 1.5x grayscale JPEG: Vision text detection saturates well below this,
+                # and it's far smaller to encode and upload than a 2x RGB PNG
+                page_jpegs = [
+                    doc[n].get_pixmap(matrix=fitz.Matrix(1.5, 1.5), colorspace=fitz.csGRAY, alpha=False)
+                    .tobytes("jpg", jpg_quality=75)
+                    for n in window
+                ]
+                for page_num, ocr_text in zip(window, ocr_images(page_jpegs, request_id)):
+                    if ocr_text:
+                        text_blocks.append({
+                            'text': ocr_text,
+                            'page': page_num + 1,
+                            'confidence': 0.6,
+                            'type': 'page_ocr'
+                        })
             method = 'pymupdf_ocr'
             confidence = 0.6
         
     except Exception as e:
         print(f"[{request_id}] PyMuPDF failed: {e}")
     
+    finally:
+        if doc is not None:
+            doc.close()
+    
+    # Joined once, after both passes
+    raw_text = '\n\n'.join([b['text'] for b in text_blocks])
+    
     return {
         'method': method,
         'confidence': confidence,
@@ -324,7 +520,7 @@ def extract_pdf(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
 def extract_pdf_with_document_ai(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
     """Use Google Document AI for high-quality PDF extraction"""
     
-    client = documentai.DocumentProcessorServiceClient()
+    client = _get_docai_client()
     name = f"projects/{GOOGLE_PROJECT_ID}/locations/{DOCUMENT_AI_LOCATION}/processors/{DOCUMENT_AI_PROCESSOR_ID}"
     
     raw_document = documentai.RawDocument(content=file_buffer, mime_type="application/pdf")
@@ -336,12 +532,15 @@ def extract_pdf_with_document_ai(file_buffer: bytes, request_id: str) -> Dict[st
     text_blocks = []
     tables = []
     
+    # Read once: every proto-plus attribute access copies the whole document text
+    full_text = document.text
+    
     # Extract text blocks
     for page in document.pages:
         page_num = page.page_number
         
         for paragraph in page.paragraphs:
-            text = get_text_from_layout(paragraph.layout, document.text)
+            text = get_text_from_layout(paragraph.layout, full_text)
             confidence = paragraph.layout.confidence if paragraph.layout.confidence else 0.9
             text_blocks.append({
                 'text': text,
@@ -356,7 +555,7 @@ def extract_pdf_with_document_ai(file_buffer: bytes, request_id: str) -> Dict[st
             for row in table.header_rows + table.body_rows:
                 row_data = []
                 for cell in row.cells:
-                    cell_text = get_text_from_layout(cell.layout, document.text)
+                    cell_text = get_text_from_layout(cell.layout, full_text)
                     row_data.append(cell_text)
                 table_data.append(row_data)
             tables.append({
@@ -365,7 +564,7 @@ def extract_pdf_with_document_ai(file_buffer: bytes, request_id: str) -> Dict[st
                 'confidence': 0.9
             })
     
-    raw_text = document.text
+    raw_text = full_text
     avg_confidence = sum(b['confidence'] for b in text_blocks) / len(text_blocks) if text_blocks else 0.9
     
     return {
@@ -381,12 +580,10 @@ def extract_pdf_with_document_ai(file_buffer: bytes, request_id: str) -> Dict[st
 
 def get_text_from_layout(layout, full_text: str) -> str:
     """Extract text from Document AI layout"""
-    text = ""
-    for segment in layout.text_anchor.text_segments:
-        start = int(segment.start_index) if segment.start_index else 0
-        end = int(segment.end_index)
-        text += full_text[start:end]
-    return text.strip()
+    return ''.join(
+        full_text[int(segment.start_index or 0):int(segment.end_index)]
+        for segment in layout.text_anchor.text_segments
+    ).strip()
 
 # =============================================================================
 # PPTX EXTRACTION - python-pptx with notes, tables, image OCR
@@ -400,6 +597,7 @@ def extract_pptx(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
     text_blocks = []
     tables = []
     images = []
+    ocr_queue = []  # (text_blocks index, slide_num, image bytes)
     
     try:
         prs = Presentation(io.BytesIO(file_buffer))
@@ -446,22 +644,11 @@ def extract_pptx(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
                             'type': 'table'
                         })
                 
-                # Images - OCR if slide has little text
+                # Images - OCR if slide has little text (queued, OCR'd after the walk)
                 if hasattr(shape, 'image') and len(' '.join(slide_texts)) < 50:
                     try:
-                        image_bytes = shape.image.blob
-                        ocr_text = ocr_image(image_bytes, request_id)
-                        if ocr_text and len(ocr_text) > 20:
-                            text_blocks.append({
-                                'text': ocr_text,
-                                'page': slide_num,
-                                'confidence': 0.7,
-                                'type': 'image_ocr'
-                            })
-                            images.append({
-                                'page': slide_num,
-                                'ocr_text': ocr_text
-                            })
+                        ocr_queue.append((len(text_blocks), slide_num, shape.image.blob))
+                        text_blocks.append(None)
                     except Exception as e:
                         print(f"[{request_id}] Image OCR failed: {e}")
             
@@ -476,6 +663,22 @@ def extract_pptx(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
                         'type': 'speaker_notes'
                     })
         
+        # OCR all queued slide images concurrently and fill their placeholders
+        ocr_texts = ocr_images([blob for _, _, blob in ocr_queue], request_id)
+        for (index, slide_num, _), ocr_text in zip(ocr_queue, ocr_texts):
+            if ocr_text and len(ocr_text) > 20:
+                text_blocks[index] = {
+                    'text': ocr_text,
+                    'page': slide_num,
+                    'confidence': 0.7,
+                    'type': 'image_ocr'
+                }
+                images.append({
+                    'page': slide_num,
+                    'ocr_text': ocr_text
+                })
+        text_blocks = [b for b in text_blocks if b is not None]
+        
         raw_text = '\n\n'.join([b['text'] for b in text_blocks])
         
         print(f"[{request_id}] Extracted {len(prs.slides)} slides, {len(text_blocks)} blocks, {len(tables)} tables")
@@ -510,12 +713,15 @@ def extract_docx(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
     try:
         doc = Document(io.BytesIO(file_buffer))
         
+        # Resolve heading styles once; para.style re-queries the styles part every time
+        heading_style_ids = {s.style_id for s in doc.styles if (s.name or '').startswith('Heading')}
+        
         # Extract paragraphs
         for para in doc.paragraphs:
             text = para.text.strip()
             if text:
-                # Detect headers
-                para_type = 'heading' if para.style.name.startswith('Heading') else 'paragraph'
+                # Detect headers (w:pStyle is read straight off the paragraph XML)
+                para_type = 'heading' if para._p.style in heading_style_ids else 'paragraph'
                 text_blocks.append({
                     'text': text,
                     'page': 1,  # DOCX doesn't have page info
@@ -546,22 +752,25 @@ def extract_docx(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
                     'type': 'table'
                 })
         
-        # Extract images and OCR them
+        # Extract images and OCR them concurrently (reltype is a plain string
+        # compare, unlike target_ref)
+        image_blobs = []
         for rel in doc.part.rels.values():
-            if "image" in rel.target_ref:
+            if rel.reltype == RT.IMAGE and not rel.is_external:
                 try:
-                    image_data = rel.target_part.blob
-                    ocr_text = ocr_image(image_data, request_id)
-                    if ocr_text and len(ocr_text) > 20:
-                        text_blocks.append({
-                            'text': f"[Image Text]\n{ocr_text}",
-                            'page': 1,
-                            'confidence': 0.7,
-                            'type': 'image_ocr'
-                        })
-                        images.append({'ocr_text': ocr_text})
+                    image_blobs.append(rel.target_part.blob)
                 except Exception as e:
                     print(f"[{request_id}] Image OCR failed: {e}")
+
+        for ocr_text in ocr_images(image_blobs, request_id):
+            if ocr_text and len(ocr_text) > 20:
+                text_blocks.append({
+                    'text': f"[Image Text]\n{ocr_text}",
+                    'page': 1,
+                    'confidence': 0.7,
+                    'type': 'image_ocr'
+                })
+                images.append({'ocr_text': ocr_text})
         
         raw_text = '\n\n'.join([b['text'] for b in text_blocks])
         
@@ -585,20 +794,36 @@ def extract_docx(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
 # TXT EXTRACTION
 # =============================================================================
 
+TXT_DETECT_SAMPLE_BYTES = 64 * 1024
+
+
+def detect_legacy_encoding(sample: bytes) -> str:
+    """Pick the codepage of non-UTF-8 text from a sample.
+
+    charset-normalizer often mislabels short Western text (e.g. German as
+    mac_iceland), so cp1252 wins whenever it decodes the sample at least as
+    cleanly as the detected charset.
+    """
+    match = from_bytes(sample).best()
+    if match is None:
+        return 'cp1252'
+    try:
+        western = sample.decode('cp1252')
+    except UnicodeDecodeError:
+        return match.encoding
+    return 'cp1252' if mess_ratio(western) <= mess_ratio(str(match)) else match.encoding
+
+
 def extract_txt(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
     """Extract text from plain text file"""
     
-    # Try different encodings
-    text = None
-    for encoding in ['utf-8', 'latin-1', 'cp1252']:
-        try:
-            text = file_buffer.decode(encoding)
-            break
-        except:
-            continue
-    
-    if not text:
-        text = file_buffer.decode('utf-8', errors='ignore')
+    # UTF-8 covers almost every upload; otherwise detect the charset from a
+    # 64KB sample instead of trial-decoding the whole buffer per candidate
+    try:
+        text = file_buffer.decode('utf-8')
+    except UnicodeDecodeError:
+        encoding = detect_legacy_encoding(file_buffer[:TXT_DETECT_SAMPLE_BYTES])
+        text = file_buffer.decode(encoding, errors='replace')
     
     return {
         'method': 'direct_read',
@@ -614,62 +839,161 @@ def extract_txt(file_buffer: bytes, request_id: str) -> Dict[str, Any]:
 # OCR HELPER - Google Cloud Vision
 # =============================================================================
 
-def ocr_image(image_data: bytes, request_id: str) -> Optional[str]:
-    """OCR an image using Google Cloud Vision"""
+OCR_CONCURRENCY = int(os.environ.get('OCR_CONCURRENCY', '16'))
+VISION_BATCH_SIZE = 16  # Vision API limit for images per batch_annotate_images call
+# Vision rejects requests over ~10MB, and image bytes count base64-encoded
+VISION_BATCH_MAX_BYTES = int(os.environ.get('VISION_BATCH_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Vision/Vertex/OpenAI calls are blocking gRPC/HTTP I/O. They run on one pool shared
+# by all requests, instead of a fresh default executor per asyncio.run().
+_ocr_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('OCR_POOL_WORKERS', '32')),
+    thread_name_prefix='ocr',
+)
+
+
+def _vision_batches(images: List[bytes]) -> List[List[bytes]]:
+    """Group images in order, capped by count and by cumulative base64 size.
+
+    An image over the size cap on its own still gets a batch of one.
+    """
+    batches: List[List[bytes]] = []
+    batch: List[bytes] = []
+    batch_bytes = 0
+    for image_data in images:
+        encoded_size = 4 * ((len(image_data) + 2) // 3)
+        if batch and (len(batch) >= VISION_BATCH_SIZE or batch_bytes + encoded_size > VISION_BATCH_MAX_BYTES):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(image_data)
+        batch_bytes += encoded_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _ocr_batch(images: List[bytes], request_id: str) -> List[Optional[str]]:
+    """OCR images with batched Vision RPCs, then run fallbacks for the misses.
+
+    Results are returned in input order.
+    """
+    semaphore = asyncio.Semaphore(OCR_CONCURRENCY)
+
+    loop = asyncio.get_running_loop()
+
+    async def _run(fn, *args):
+        async with semaphore:
+            return await loop.run_in_executor(_ocr_pool, fn, *args)
+
+    async def _run_batch(batch):
+        try:
+            return await _run(ocr_with_vision, batch, request_id)
+        except Exception as e:
+            if len(batch) == 1:
+                raise
+            # A rejected batch (e.g. request too large) shouldn't cost every image in it
+            print(f"[{request_id}] Vision batch of {len(batch)} failed, retrying per image: {e}")
+            results = await asyncio.gather(
+                *(_run(ocr_with_vision, [image_data], request_id) for image_data in batch),
+                return_exceptions=True,
+            )
+            texts = []
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"[{request_id}] Vision OCR failed: {result}")
+                    texts.append(None)
+                else:
+                    texts.extend(result)
+            return texts
+
+    batches = _vision_batches(images)
+    batch_results = await asyncio.gather(
+        *(_run_batch(batch) for batch in batches),
+        return_exceptions=True,
+    )
+
+    texts: List[Optional[str]] = []
+    for batch, result in zip(batches, batch_results):
+        if isinstance(result, Exception):
+            print(f"[{request_id}] Vision OCR failed: {result}")
+            result = [None] * len(batch)
+        texts.extend(result)
+
+    # Vision returned no text (or failed). Try stronger multimodal fallback(s).
+    missing = [i for i, text in enumerate(texts) if text is None]
+    if missing and (VERTEX_GEMINI_OCR_ENABLED or OPENAI_API_KEY):
+        fallback_texts = await asyncio.gather(*(_run(ocr_fallback, images[i], request_id) for i in missing))
+        for i, text in zip(missing, fallback_texts):
+            texts[i] = text
+
+    return texts
+
+
+def ocr_images(images: List[bytes], request_id: str) -> List[Optional[str]]:
+    """OCR a document's images in one concurrent fan-out instead of serially."""
+    if not images:
+        return []
     
-    try:
-        client = vision.ImageAnnotatorClient()
-        image = vision.Image(content=image_data)
-        response = client.text_detection(image=image)
-        
-        if response.text_annotations:
-            return response.text_annotations[0].description.strip()
-        # Vision returned no text. Try stronger multimodal fallback(s).
-        if VERTEX_GEMINI_OCR_ENABLED:
-            try:
-                text = ocr_with_vertex_gemini(image_data, request_id)
-                if text:
-                    return text
-            except Exception as e:
-                print(f"[{request_id}] Vertex Gemini OCR failed: {e}")
+    # Logos and backgrounds repeat across slides/pages: OCR each distinct image once
+    digests = [hashlib.sha256(image_data).digest() for image_data in images]
+    unique = {}
+    for digest, image_data in zip(digests, images):
+        unique.setdefault(digest, image_data)
+    
+    texts = asyncio.run(_ocr_batch(list(unique.values()), request_id))
+    text_by_digest = dict(zip(unique, texts))
+    return [text_by_digest[digest] for digest in digests]
 
-        if OPENAI_API_KEY:
-            try:
-                return ocr_with_openai(image_data, request_id)
-            except Exception as e:
-                print(f"[{request_id}] OpenAI OCR fallback failed: {e}")
 
-        return None
-        
-    except Exception as e:
-        print(f"[{request_id}] Vision OCR failed: {e}")
+def ocr_with_vision(images: List[bytes], request_id: str) -> List[Optional[str]]:
+    """OCR up to VISION_BATCH_SIZE images in a single Vision RPC (None where no text)"""
+    
+    client = _get_vision_client()
+    feature = vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
+    response = client.batch_annotate_images(requests=[
+        vision.AnnotateImageRequest(image=vision.Image(content=image_data), features=[feature])
+        for image_data in images
+    ])
+    
+    texts = []
+    for result in response.responses:
+        if result.error.message:
+            print(f"[{request_id}] Vision OCR failed: {result.error.message}")
+            texts.append(None)
+        elif result.text_annotations:
+            texts.append(result.text_annotations[0].description.strip())
+        else:
+            texts.append(None)
+    return texts
 
-        # Fallback to Vertex Gemini if available (uses service account)
-        if VERTEX_GEMINI_OCR_ENABLED:
-            try:
-                text = ocr_with_vertex_gemini(image_data, request_id)
-                if text:
-                    return text
-            except Exception as e:
-                print(f"[{request_id}] Vertex Gemini OCR failed: {e}")
-        
-        # Fallback to OpenAI Vision if available
-        if OPENAI_API_KEY:
-            try:
-                return ocr_with_openai(image_data, request_id)
-            except:
-                pass
-        
-        return None
+
+def ocr_fallback(image_data: bytes, request_id: str) -> Optional[str]:
+    """OCR an image Vision couldn't read: Vertex Gemini → OpenAI Vision"""
+    
+    # Fallback to Vertex Gemini if available (uses service account)
+    if VERTEX_GEMINI_OCR_ENABLED:
+        try:
+            text = ocr_with_vertex_gemini(image_data, request_id)
+            if text:
+                return text
+        except Exception as e:
+            print(f"[{request_id}] Vertex Gemini OCR failed: {e}")
+    
+    # Fallback to OpenAI Vision if available
+    if OPENAI_API_KEY:
+        try:
+            return ocr_with_openai(image_data, request_id)
+        except Exception as e:
+            print(f"[{request_id}] OpenAI OCR fallback failed: {e}")
+    
+    return None
 
 
 def ocr_with_vertex_gemini(image_data: bytes, request_id: str) -> Optional[str]:
     """OCR using Vertex AI Gemini (service account auth) as fallback."""
 
     # Acquire OAuth token for Vertex AI
-    creds, _ = google.auth.default(scopes=['https://www.googleapis.com/auth/cloud-platform'])
-    creds.refresh(GoogleAuthRequest())
-    token = creds.token
+    token = _get_vertex_token()
     if not token:
         raise RuntimeError('Failed to acquire Google auth token')
 
@@ -685,7 +1009,7 @@ def ocr_with_vertex_gemini(image_data: bytes, request_id: str) -> Optional[str]:
                 'role': 'user',
                 'parts': [
                     {'text': 'Extract ALL text from this image. Output only the text, nothing else.'},
-                    {'inlineData': {'mimeType': 'image/png', 'data': base64_image}},
+                    {'inlineData': {'mimeType': image_mime_type(image_data), 'data': base64_image}},
                 ],
             }
         ],
@@ -695,7 +1019,7 @@ def ocr_with_vertex_gemini(image_data: bytes, request_id: str) -> Optional[str]:
         },
     }
 
-    resp = requests.post(
+    resp = _http.post(
         endpoint,
         headers={
             'Authorization': f'Bearer {token}',
@@ -719,7 +1043,7 @@ def ocr_with_openai(image_data: bytes, request_id: str) -> Optional[str]:
     
     base64_image = base64.b64encode(image_data).decode('utf-8')
     
-    response = requests.post(
+    response = _http.post(
         'https://api.openai.com/v1/chat/completions',
         headers={
             'Authorization': f'Bearer {OPENAI_API_KEY}',
@@ -731,7 +1055,7 @@ def ocr_with_openai(image_data: bytes, request_id: str) -> Optional[str]:
                 'role': 'user',
                 'content': [
                     {'type': 'text', 'text': 'Extract ALL text from this image. Output only the text, nothing else.'},
-                    {'type': 'image_url', 'image_url': {'url': f'data:image/png;base64,{base64_image}'}}
+                    {'type': 'image_url', 'image_url': {'url': f'data:{image_mime_type(image_data)};base64,{base64_image}'}}
                 ]
             }],
             'max_tokens': 4000
@@ -785,23 +1109,81 @@ def build_canonical_model(result: Dict, filename: str, file_type: str, file_size
 # HELPERS
 # =============================================================================
 
-def detect_file_type(filename: str, mimetype: str) -> str:
-    """Detect file type from filename or mimetype"""
+def json_response(payload: Any, status: int = 200):
+    """Serialize a JSON response with orjson (much faster than jsonify on large canonical models)"""
+    
+    return app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
+def image_mime_type(image_data: bytes) -> str:
+    """Sniff the MIME type of image bytes sent to the multimodal OCR fallbacks"""
+    
+    if image_data[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if image_data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if image_data[:4] == b'RIFF' and image_data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/png'
+
+
+def download_to_tempfile(url: str, filename: str) -> str:
+    """Stream a download to a temp file in 1MB chunks and return its path"""
+    
+    suffix = os.path.splitext(filename)[1]
+    with _http.get(url, stream=True, timeout=300) as response:
+        response.raise_for_status()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            try:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    tmp.write(chunk)
+            except Exception:
+                os.unlink(tmp.name)
+                raise
+    return tmp.name
+
+
+_EXT_MAP = {
+    'pdf': 'pdf',
+    'pptx': 'pptx', 'ppt': 'pptx',
+    'docx': 'docx', 'doc': 'docx',
+    'txt': 'txt',
+    'png': 'image', 'jpg': 'image', 'jpeg': 'image', 'webp': 'image', 'gif': 'image',
+}
+
+# Checked in order; the first keyword found in the mimetype wins
+_MIME_MAP = (
+    ('pdf', 'pdf'),
+    ('presentation', 'pptx'),
+    ('powerpoint', 'pptx'),
+    ('word', 'docx'),
+    ('document', 'docx'),
+    ('text/plain', 'txt'),
+)
+
+# All keywords in one alternation so the mimetype is scanned once; the
+# earliest table entry among the hits keeps the priority order above
+_MIME_RE = re.compile('|'.join(re.escape(keyword) for keyword, _ in _MIME_MAP))
+_MIME_RANK = {keyword: (rank, mime_type) for rank, (keyword, mime_type) in enumerate(_MIME_MAP)}
+
+@lru_cache(maxsize=4096)
+def _detect_by_ext_mime(ext: str, mimetype: str) -> str:
+    """Resolve a lowercased extension and mimetype to a file type"""
     
-    ext = filename.lower().split('.')[-1] if '.' in filename else ''
+    # A known extension settles it; skip the mimetype scans
+    file_type = _EXT_MAP.get(ext)
+    if file_type:
+        return file_type
     
-    if ext == 'pdf' or 'pdf' in mimetype:
-        return 'pdf'
-    if ext in ['pptx', 'ppt'] or 'presentation' in mimetype or 'powerpoint' in mimetype:
-        return 'pptx'
-    if ext in ['docx', 'doc'] or 'word' in mimetype or 'document' in mimetype:
-        return 'docx'
-    if ext == 'txt' or 'text/plain' in mimetype:
-        return 'txt'
-    if ext in ['png', 'jpg', 'jpeg', 'webp', 'gif']:
-        return 'image'
+    hits = [_MIME_RANK[m.group()] for m in _MIME_RE.finditer(mimetype)]
+    return min(hits)[1] if hits else 'unknown'
+
+def detect_file_type(filename: str, mimetype: str) -> str:
+    """Detect file type from filename or mimetype"""
     
-    return 'unknown'
+    dot = filename.rfind('.')
+    ext = filename[dot + 1:].lower() if dot != -1 else ''
+    return _detect_by_ext_mime(ext, mimetype)
 
 # =============================================================================
 # MAIN
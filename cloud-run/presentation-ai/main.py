@@ -13,179 +13,426 @@ Architecture:
 
 import os
 import io
+import sys
+import atexit
+import queue
+import shutil
+import subprocess
+import threading
+import multiprocessing
+import logging
+import re
 import uuid
 import time
-import json
-import base64
+import pybase64
+import hashlib
+import hmac
+import importlib.util
 import tempfile
+import orjson
+import diskcache
 import requests
-from typing import Optional, Dict, Any, List
-from flask import Flask, request, jsonify, send_file
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from copy import deepcopy
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, wraps
+from logging.handlers import QueueHandler, QueueListener
+from types import MappingProxyType
+from dataclasses import dataclass, asdict, replace
+from typing import IO, TYPE_CHECKING, Optional, Dict, Any, List, Tuple, Union
+from flask import Flask, Response, request, jsonify, send_file, copy_current_request_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from pptx import Presentation
-from pptx.util import Inches, Pt, Emu
-from pptx.dml.color import RGBColor
-from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
-from pptx.enum.shapes import MSO_SHAPE
-from PIL import Image
-
-# PDF generation imports
-from reportlab.lib import colors as rl_colors
-from reportlab.lib.pagesizes import LETTER, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-
-# Web search imports
-try:
-    from duckduckgo_search import DDGS
-    SEARCH_ENABLED = True
-except ImportError:
-    SEARCH_ENABLED = False
-    print('[Warning] duckduckgo-search not installed. Web search disabled.')
+
+# python-pptx, ReportLab and duckduckgo-search are imported inside the functions
+# that use them, so cold starts and health checks don't pay for them
+if TYPE_CHECKING:
+    from pptx.dml.color import RGBColor
+    from reportlab.lib.styles import ParagraphStyle
+
+# Records go on a queue and one listener thread writes them to stdout, so
+# request and media-pool threads never block on the stdout lock. Threads don't
+# survive fork, so each gunicorn worker starts its own listener.
+log = logging.getLogger('presentation-ai')
+log.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+log.propagate = False
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.setFormatter(logging.Formatter('%(message)s'))
+_log_listener = None
+
+def _start_log_listener():
+    """Point the logger at a fresh queue drained by a background listener"""
+    global _log_listener
+    log_queue = queue.SimpleQueue()
+    log.handlers[:] = [QueueHandler(log_queue)]
+    _log_listener = QueueListener(log_queue, _log_handler)
+    _log_listener.start()
+
+_start_log_listener()
+os.register_at_fork(after_in_child=_start_log_listener)
+atexit.register(lambda: _log_listener.stop())
+
+SEARCH_ENABLED = importlib.util.find_spec('duckduckgo_search') is not None
+if not SEARCH_ENABLED:
+    log.warning('[Warning] duckduckgo-search not installed. Web search disabled.')
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.json"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), mimetype='application/json')
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Configuration
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 CANVA_API_KEY = os.environ.get('CANVA_API_KEY', '')
+CANVA_ENABLED = bool(CANVA_API_KEY)
 MIDJOURNEY_API_KEY = os.environ.get('MIDJOURNEY_API_KEY', '')  # Via proxy service
 
+OPENAI_HEADERS = {
+    'Authorization': f'Bearer {OPENAI_API_KEY}',
+    'Content-Type': 'application/json'
+}
+
+# Shared keep-alive session so repeated API calls reuse pooled TLS connections
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False,
+    ),
+))
+
+# GPT-4o often wraps JSON in a ```json ... ``` markdown fence
+_FENCE_RE = re.compile(r"```(?:json)?(.*?)(?:```|$)", re.S)
+
+def strip_json_fence(text: str) -> str:
+    """Return the JSON payload inside the first markdown fence, or the whole text"""
+    m = _FENCE_RE.search(text)
+    return (m.group(1) if m else text).strip()
+
+# Disk cache for GPT-4o, search, image and diagram responses, shared by all workers on the instance
+OPENAI_CACHE_DIR = os.environ.get('OPENAI_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'mindsparkle-openai'))
+OPENAI_CACHE_TTL = int(os.environ.get('OPENAI_CACHE_TTL', 24 * 3600))  # seconds; 0 disables
+OPENAI_CACHE_SIZE_MB = int(os.environ.get('OPENAI_CACHE_SIZE_MB', '512'))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+CACHE = diskcache.Cache(OPENAI_CACHE_DIR, size_limit=OPENAI_CACHE_SIZE_MB * 1024 * 1024)
+
+# JSON mode only allows a top-level object, so every prompt asks for its array
+# wrapped as {"items": [...]}
+JSON_MODE_INSTRUCTION = ' Respond with a JSON object of the form {"items": [...]} where items is the requested array.'
+
+def cache_key(prefix: str, payload: bytes) -> str:
+    """Build a compact cache key from a request payload"""
+    return f'{prefix}:{hashlib.blake2b(payload, digest_size=20).hexdigest()}'
+
+# Identical cache misses in flight at the same time in this worker share one
+# call: the first caller runs it and the rest wait on its Future
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+def singleflight(key: str, fn):
+    """Call fn, or wait for the call already running under the same key"""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    
+    if not leader:
+        # Callers mutate the slide lists they get back, so each waiter gets its
+        # own copy, just as a cache hit does
+        return deepcopy(future.result())
+    
+    try:
+        value = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        # The leader edits its value too, so waiters copy from a snapshot it never sees
+        future.set_result(deepcopy(value))
+        return value
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+
+def cached_call(key: str, fn):
+    """Return a cached value for key, or call fn and cache a non-empty result"""
+    if OPENAI_CACHE_TTL <= 0:
+        return fn()
+    
+    value = CACHE.get(key)
+    if value is not None:
+        log.debug('[Cache] Hit %s', key[:20])
+        return value
+    
+    def load():
+        value = fn()
+        if value:
+            CACHE.set(key, value, expire=OPENAI_CACHE_TTL)
+        return value
+    
+    return singleflight(key, load)
+
+def openai_chat_json(system_prompt: str, prompt: str, temperature: float, max_tokens: int, timeout: int, label: str = 'GPT-4o', item_type: type = dict) -> List[Any]:
+    """Run a GPT-4o chat completion in JSON mode and return the parsed array.
+
+    The completion is streamed, so the timeout bounds the gap between tokens
+    rather than the whole generation. Every element must be an item_type, or
+    ValueError is raised. Parsed results are cached by request payload, so an
+    identical request within OPENAI_CACHE_TTL skips the call.
+    """
+    payload = orjson.dumps({
+        'model': 'gpt-4o',
+        'messages': [
+            {'role': 'system', 'content': system_prompt + JSON_MODE_INSTRUCTION},
+            {'role': 'user', 'content': prompt}
+        ],
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'response_format': {'type': 'json_object'},
+        'stream': True
+    })
+    
+    def request_completion():
+        start = time.time()
+        with SESSION.post(
+            'https://api.openai.com/v1/chat/completions',
+            headers=OPENAI_HEADERS,
+            data=payload,
+            timeout=timeout,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                result = orjson.loads(response.content)
+                raise Exception(f"OpenAI API error: {result.get('error', {}).get('message', 'Unknown error')}")
+            
+            parts = []
+            first_token_at = None
+            for line in response.iter_lines():
+                if not line.startswith(b'data: '):
+                    continue
+                data = line[6:]
+                if data == b'[DONE]':
+                    break
+                chunk = orjson.loads(data)
+                if not chunk.get('choices'):
+                    continue
+                delta = chunk['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.time()
+                    parts.append(delta)
+        
+        content_text = ''.join(parts)
+        ttft = round((first_token_at or time.time()) - start, 2)
+        log.info('[%s] Raw response length: %s (first token %ss, total %ss)', label, len(content_text), ttft, round(time.time() - start, 2))
+        
+        # Parse JSON from response; JSON mode answers with an object, so unwrap the array.
+        # Errors are raised inside the call, so the caller's fallback handles them and
+        # nothing is cached
+        parsed = orjson.loads(strip_json_fence(content_text))
+        items = None
+        if isinstance(parsed, list):
+            items = parsed
+        elif isinstance(parsed, dict):
+            if isinstance(parsed.get('items'), list):
+                items = parsed['items']
+            else:
+                # The model sometimes names the key itself ({"slides": [...]}); only
+                # trust that when it's the sole array, so a lone slide's bullet_points
+                # aren't mistaken for the deck
+                lists = [value for value in parsed.values() if isinstance(value, list)]
+                if len(lists) == 1:
+                    items = lists[0]
+        if items is None:
+            raise ValueError(f'{label} returned JSON without an array: {content_text[:200]}')
+        if not all(isinstance(item, item_type) for item in items):
+            raise ValueError(f'{label} returned array items that are not {item_type.__name__}: {content_text[:200]}')
+        return items
+    
+    return cached_call(cache_key('chat', payload), request_completion)
+
 # =============================================================================
 # PRESENTATION STYLES
 # =============================================================================
 
-PRESENTATION_STYLES = {
-    'professional': {
-        'name': 'Professional',
-        'description': 'Clean, corporate look with blue accent',
-        'primary_color': '2563EB',  # Blue
-        'secondary_color': '1E40AF',
-        'accent_color': '3B82F6',
-        'background': 'FFFFFF',
-        'text_color': '1F2937',
-        'font_title': 'Arial',
-        'font_body': 'Arial',
-    },
-    'modern': {
-        'name': 'Modern',
-        'description': 'Bold, contemporary design with gradients',
-        'primary_color': '7C3AED',  # Purple
-        'secondary_color': '5B21B6',
-        'accent_color': 'A78BFA',
-        'background': 'FAFAFA',
-        'text_color': '111827',
-        'font_title': 'Helvetica',
-        'font_body': 'Helvetica',
-    },
-    'minimal': {
-        'name': 'Minimal',
-        'description': 'Simple, elegant with lots of whitespace',
-        'primary_color': '000000',
-        'secondary_color': '374151',
-        'accent_color': '6B7280',
-        'background': 'FFFFFF',
-        'text_color': '111827',
-        'font_title': 'Helvetica',
-        'font_body': 'Helvetica',
-    },
-    'creative': {
-        'name': 'Creative',
-        'description': 'Colorful, dynamic with bold elements',
-        'primary_color': 'EC4899',  # Pink
-        'secondary_color': 'F59E0B',  # Orange
-        'accent_color': '10B981',  # Green
-        'background': 'FFF7ED',
-        'text_color': '1F2937',
-        'font_title': 'Arial Black',
-        'font_body': 'Arial',
-    },
-    'dark': {
-        'name': 'Dark Mode',
-        'description': 'Dark background with light text',
-        'primary_color': '60A5FA',  # Light blue
-        'secondary_color': '34D399',  # Green
-        'accent_color': 'F472B6',  # Pink
-        'background': '111827',
-        'text_color': 'F9FAFB',
-        'font_title': 'Arial',
-        'font_body': 'Arial',
-    },
-    'academic': {
-        'name': 'Academic',
-        'description': 'Formal, scholarly presentation style',
-        'primary_color': '1E3A5F',  # Navy
-        'secondary_color': '7C2D12',  # Brown
-        'accent_color': '047857',  # Dark green
-        'background': 'FFFBEB',
-        'text_color': '1F2937',
-        'font_title': 'Times New Roman',
-        'font_body': 'Georgia',
-    },
-    'startup': {
-        'name': 'Startup Pitch',
-        'description': 'High-energy, investor-ready design',
-        'primary_color': 'EF4444',  # Red
-        'secondary_color': 'F97316',  # Orange
-        'accent_color': 'FBBF24',  # Yellow
-        'background': 'FFFFFF',
-        'text_color': '0F172A',
-        'font_title': 'Arial Black',
-        'font_body': 'Arial',
-    },
-    'education': {
-        'name': 'Education',
-        'description': 'Friendly, engaging for learning',
-        'primary_color': '0891B2',  # Cyan
-        'secondary_color': '0D9488',  # Teal
-        'accent_color': 'F59E0B',  # Amber
-        'background': 'F0FDFA',
-        'text_color': '134E4A',
-        'font_title': 'Arial',
-        'font_body': 'Arial',
-    },
+@dataclass(frozen=True, slots=True)
+class PresentationStyle:
+    """Theme colors (hex, no '#') and fonts for a presentation style"""
+    name: str
+    description: str
+    primary_color: str
+    secondary_color: str
+    accent_color: str
+    background: str
+    text_color: str
+    font_title: str
+    font_body: str
+
+PRESENTATION_STYLES: Dict[str, PresentationStyle] = {
+    'professional': PresentationStyle(
+        name='Professional',
+        description='Clean, corporate look with blue accent',
+        primary_color='2563EB',  # Blue
+        secondary_color='1E40AF',
+        accent_color='3B82F6',
+        background='FFFFFF',
+        text_color='1F2937',
+        font_title='Arial',
+        font_body='Arial',
+    ),
+    'modern': PresentationStyle(
+        name='Modern',
+        description='Bold, contemporary design with gradients',
+        primary_color='7C3AED',  # Purple
+        secondary_color='5B21B6',
+        accent_color='A78BFA',
+        background='FAFAFA',
+        text_color='111827',
+        font_title='Helvetica',
+        font_body='Helvetica',
+    ),
+    'minimal': PresentationStyle(
+        name='Minimal',
+        description='Simple, elegant with lots of whitespace',
+        primary_color='000000',
+        secondary_color='374151',
+        accent_color='6B7280',
+        background='FFFFFF',
+        text_color='111827',
+        font_title='Helvetica',
+        font_body='Helvetica',
+    ),
+    'creative': PresentationStyle(
+        name='Creative',
+        description='Colorful, dynamic with bold elements',
+        primary_color='EC4899',  # Pink
+        secondary_color='F59E0B',  # Orange
+        accent_color='10B981',  # Green
+        background='FFF7ED',
+        text_color='1F2937',
+        font_title='Arial Black',
+        font_body='Arial',
+    ),
+    'dark': PresentationStyle(
+        name='Dark Mode',
+        description='Dark background with light text',
+        primary_color='60A5FA',  # Light blue
+        secondary_color='34D399',  # Green
+        accent_color='F472B6',  # Pink
+        background='111827',
+        text_color='F9FAFB',
+        font_title='Arial',
+        font_body='Arial',
+    ),
+    'academic': PresentationStyle(
+        name='Academic',
+        description='Formal, scholarly presentation style',
+        primary_color='1E3A5F',  # Navy
+        secondary_color='7C2D12',  # Brown
+        accent_color='047857',  # Dark green
+        background='FFFBEB',
+        text_color='1F2937',
+        font_title='Times New Roman',
+        font_body='Georgia',
+    ),
+    'startup': PresentationStyle(
+        name='Startup Pitch',
+        description='High-energy, investor-ready design',
+        primary_color='EF4444',  # Red
+        secondary_color='F97316',  # Orange
+        accent_color='FBBF24',  # Yellow
+        background='FFFFFF',
+        text_color='0F172A',
+        font_title='Arial Black',
+        font_body='Arial',
+    ),
+    'education': PresentationStyle(
+        name='Education',
+        description='Friendly, engaging for learning',
+        primary_color='0891B2',  # Cyan
+        secondary_color='0D9488',  # Teal
+        accent_color='F59E0B',  # Amber
+        background='F0FDFA',
+        text_color='134E4A',
+        font_title='Arial',
+        font_body='Arial',
+    ),
 }
 
+_STYLE_KEYS = tuple(PRESENTATION_STYLES)
+_DEFAULT_STYLE = PRESENTATION_STYLES['professional']
+
+def get_style(style_name: str) -> PresentationStyle:
+    """Look up a presentation style, falling back to 'professional'"""
+    return PRESENTATION_STYLES.get(style_name, _DEFAULT_STYLE)
+
+# JSON-ready copy of the styles for the metadata endpoints
+_STYLES_PAYLOAD = {key: asdict(style) for key, style in PRESENTATION_STYLES.items()}
+
 # =============================================================================
 # HEALTH CHECK
 # =============================================================================
 
+# Static metadata responses, serialized once at import
+_INDEX_BODY = orjson.dumps({
+    'service': 'MindSparkle AI Presentation Generator',
+    'version': '2.0.0',
+    'status': 'healthy',
+    'ai_vendors': {
+        'content': 'OpenAI GPT-4o',
+        'images': 'DALL-E 3 / Midjourney',
+        'diagrams': 'Mermaid.js',
+        'templates': 'Canva API + Custom',
+        'web_search': 'DuckDuckGo' if SEARCH_ENABLED else 'Disabled'
+    },
+    'features': {
+        'basic_generation': True,
+        'enhanced_generation': SEARCH_ENABLED,
+        'web_search_enrichment': SEARCH_ENABLED,
+        'professional_slides': True,
+        'pdf_export': True,
+        'pptx_export': True
+    },
+    'styles': list(_STYLE_KEYS),
+    'endpoints': {
+        'POST /generate': 'Generate presentation from document',
+        'POST /generate-enhanced': 'Generate with web search enrichment',
+        'POST /generate-pdf': 'Generate PDF presentation',
+        'POST /generate-pdf-enhanced': 'Generate enhanced PDF with web search',
+        'POST /generate-slide': 'Generate single slide',
+        'POST /preview': 'Preview slide structure',
+        'GET /styles': 'Get available styles',
+        'GET /download/:id': 'Download generated PPTX',
+        'GET /download-pdf/:id': 'Download generated PDF',
+    }
+})
+
+_STYLES_BODY = orjson.dumps({'styles': _STYLES_PAYLOAD})
+
 @app.route('/', methods=['GET'])
 def index():
-    return jsonify({
-        'service': 'MindSparkle AI Presentation Generator',
-        'version': '2.0.0',
-        'status': 'healthy',
-        'ai_vendors': {
-            'content': 'OpenAI GPT-4o',
-            'images': 'DALL-E 3 / Midjourney',
-            'diagrams': 'Mermaid.js',
-            'templates': 'Canva API + Custom',
-            'web_search': 'DuckDuckGo' if SEARCH_ENABLED else 'Disabled'
-        },
-        'features': {
-            'basic_generation': True,
-            'enhanced_generation': SEARCH_ENABLED,
-            'web_search_enrichment': SEARCH_ENABLED,
-            'professional_slides': True,
-            'pdf_export': True,
-            'pptx_export': True
-        },
-        'styles': list(PRESENTATION_STYLES.keys()),
-        'endpoints': {
-            'POST /generate': 'Generate presentation from document',
-            'POST /generate-enhanced': 'Generate with web search enrichment',
-            'POST /generate-pdf': 'Generate PDF presentation',
-            'POST /generate-pdf-enhanced': 'Generate enhanced PDF with web search',
-            'POST /generate-slide': 'Generate single slide',
-            'POST /preview': 'Preview slide structure',
-            'GET /styles': 'Get available styles',
-            'GET /download/:id': 'Download generated PPTX',
-            'GET /download-pdf/:id': 'Download generated PDF',
-        }
-    })
+    return Response(_INDEX_BODY, mimetype='application/json')
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -193,52 +440,78 @@ def health():
 
 @app.route('/styles', methods=['GET'])
 def get_styles():
-    return jsonify({'styles': PRESENTATION_STYLES})
+    return Response(_STYLES_BODY, mimetype='application/json')
+
+class HealthShortcut:
+    """WSGI middleware answering GET /health and GET / before Flask dispatch.
+
+    Cloud Run probes these constantly; the bodies are prebuilt bytes and the
+    health timestamp is re-rendered at most once per second.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self._health = (0, b'')
+
+    def health_body(self) -> bytes:
+        now = int(time.time())
+        second, body = self._health
+        if second != now:
+            body = orjson.dumps({'status': 'healthy', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ')})
+            self._health = (now, body)
+        return body
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') == 'GET':
+            path = environ.get('PATH_INFO')
+            if path == '/health':
+                body = self.health_body()
+            elif path == '/':
+                body = _INDEX_BODY
+            else:
+                return self.inner(environ, start_response)
+            start_response('200 OK', [
+                ('Content-Type', 'application/json'),
+                ('Content-Length', str(len(body))),
+                ('Access-Control-Allow-Origin', '*'),
+            ])
+            return [body]
+        return self.inner(environ, start_response)
+
+app.wsgi_app = HealthShortcut(app.wsgi_app)
 
 @app.route('/canva/status', methods=['GET'])
 def canva_status():
     """Check Canva API integration status"""
-    is_configured = bool(CANVA_API_KEY)
+    is_configured = CANVA_ENABLED
     return jsonify({
         'canva_enabled': is_configured,
+        'circuit_open': _canva_circuit_open(),
         'message': 'Canva API is configured and ready' if is_configured else 'Canva API key not configured. Using python-pptx fallback.',
         'fallback': 'python-pptx'
     })
 
+@app.route('/cache/clear', methods=['POST'])
+def clear_cache():
+    """Drop cached GPT-4o and web search responses (requires ADMIN_TOKEN)"""
+    auth = request.headers.get('Authorization', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(auth, f'Bearer {ADMIN_TOKEN}'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    cleared = CACHE.clear()
+    log.info('[Cache] Cleared %s entries', cleared)
+    return jsonify({'success': True, 'cleared': cleared})
+
 # =============================================================================
-# WEB SEARCH FOR ENHANCED PRESENTATIONS
+# PROMPT TEMPLATES
 # =============================================================================
 
-def search_web_for_topic(query: str, max_results: int = 5) -> List[Dict[str, str]]:
-    """Search the web using DuckDuckGo for relevant information"""
-    
-    if not SEARCH_ENABLED:
-        print('[Search] Web search not available')
-        return []
-    
-    try:
-        print(f'[Search] Searching for: {query}')
-        with DDGS() as ddgs:
-            results = []
-            for r in ddgs.text(query, max_results=max_results):
-                results.append({
-                    'title': r.get('title', ''),
-                    'body': r.get('body', ''),
-                    'url': r.get('href', '')
-                })
-            print(f'[Search] Found {len(results)} results')
-            return results
-    except Exception as e:
-        print(f'[Search] Error: {e}')
-        return []
+# Built once at import; filled with str.format per request
 
-def extract_search_queries_from_content(content: str, slide_count: int = 10) -> List[str]:
-    """Use GPT-4o to extract relevant search queries from document content"""
-    
-    prompt = f"""Analyze this document and generate {min(slide_count - 2, 5)} concise search queries to find relevant data, statistics, images, and supporting information that would enhance a professional presentation.
+SEARCH_QUERIES_PROMPT = """Analyze this document and generate {query_count} concise search queries to find relevant data, statistics, images, and supporting information that would enhance a professional presentation.
 
 DOCUMENT CONTENT:
-{content[:8000]}
+{content}
 
 Generate search queries that will find:
 - Current statistics and data
@@ -246,63 +519,13 @@ Generate search queries that will find:
 - Expert opinions and research
 - Relevant images and diagrams
 
-Return ONLY a JSON array of 3-5 search query strings. Keep queries specific and relevant.
-Example: ["artificial intelligence market growth 2025", "machine learning use cases healthcare", "AI statistics 2025"]"""
-
-    try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o',
-                'messages': [
-                    {'role': 'system', 'content': 'You are a research assistant. Extract relevant search queries. Return only valid JSON array.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.7,
-                'max_tokens': 500
-            },
-            timeout=30
-        )
-        
-        result = response.json()
-        if 'error' in result:
-            raise Exception(f"OpenAI API error: {result['error'].get('message', 'Unknown error')}")
-        
-        content_text = result['choices'][0]['message']['content']
-        
-        # Parse JSON from response
-        json_match = content_text
-        if '```json' in content_text:
-            json_match = content_text.split('```json')[1].split('```')[0]
-        elif '```' in content_text:
-            json_match = content_text.split('```')[1].split('```')[0]
-        
-        queries = json.loads(json_match.strip())
-        print(f'[Search] Extracted {len(queries)} search queries')
-        return queries if isinstance(queries, list) else []
-        
-    except Exception as e:
-        print(f'[Search] Error extracting queries: {e}')
-        return []
+Return ONLY a JSON object {{"items": [...]}} where items is an array of 3-5 search query strings. Keep queries specific and relevant.
+Example: {{"items": ["artificial intelligence market growth 2025", "machine learning use cases healthcare", "AI statistics 2025"]}}"""
 
-def generate_enhanced_slide_structure(content: str, slide_count: int = 10, style: str = 'professional', web_results: List[Dict] = None) -> List[Dict]:
-    """Generate slide structure enriched with web search results"""
-    
-    # Prepare web search context
-    web_context = ""
-    if web_results and len(web_results) > 0:
-        web_context = "\n\nADDITIONAL RESEARCH DATA FROM WEB:\n"
-        for i, result in enumerate(web_results[:10], 1):
-            web_context += f"\n{i}. {result.get('title', '')}\n{result.get('body', '')[:200]}...\nSource: {result.get('url', '')}\n"
-    
-    prompt = f"""Analyze this document and web research, then create a PROFESSIONAL {slide_count}-slide presentation.
+ENHANCED_STRUCTURE_PROMPT = """Analyze this document and web research, then create a PROFESSIONAL {slide_count}-slide presentation.
 
 DOCUMENT CONTENT:
-{content[:12000]}
+{content}
 {web_context}
 
 CREATE A PRESENTATION WITH:
@@ -353,65 +576,12 @@ LAST SLIDE MUST BE:
   "speaker_notes": "Thank the audience and invite questions"
 }}
 
-Return ONLY valid JSON array. Make it PROFESSIONAL, DATA-DRIVEN, and ENGAGING using the {style} style."""
-
-    try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o',
-                'messages': [
-                    {'role': 'system', 'content': 'You are an expert presentation designer and researcher. Create stunning, professional, data-driven presentations. Return only valid JSON.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.7,
-                'max_tokens': 4096
-            },
-            timeout=90
-        )
-        
-        result = response.json()
-        
-        if 'error' in result:
-            raise Exception(f"OpenAI API error: {result['error'].get('message', 'Unknown error')}")
-        
-        content_text = result['choices'][0]['message']['content']
-        print(f'[GPT-4o Enhanced] Raw response length: {len(content_text)}')
-        
-        # Parse JSON from response
-        json_match = content_text
-        if '```json' in content_text:
-            json_match = content_text.split('```json')[1].split('```')[0]
-        elif '```' in content_text:
-            json_match = content_text.split('```')[1].split('```')[0]
-        
-        slides = json.loads(json_match.strip())
-        print(f'[GPT-4o Enhanced] Parsed {len(slides)} slides')
-        return slides
-        
-    except Exception as e:
-        print(f'[GPT-4o Enhanced] Error: {e}')
-        import traceback
-        traceback.print_exc()
-        
-        # Fallback to basic structure
-        return generate_slide_structure(content, slide_count, style)
-
-# =============================================================================
-# GPT-4O SLIDE STRUCTURE GENERATION
-# =============================================================================
+Return ONLY a valid JSON object {{"items": [...]}} where items is the array of slides. Make it PROFESSIONAL, DATA-DRIVEN, and ENGAGING using the {style} style."""
 
-def generate_slide_structure(content: str, slide_count: int = 10, style: str = 'professional') -> List[Dict]:
-    """Use GPT-4o to generate optimal slide structure from document content"""
-    
-    prompt = f"""Analyze this document and create a {slide_count}-slide presentation structure.
+SLIDE_STRUCTURE_PROMPT = """Analyze this document and create a {slide_count}-slide presentation structure.
 
 DOCUMENT CONTENT:
-{content[:15000]}
+{content}
 
 CREATE A PRESENTATION WITH:
 1. Title slide
@@ -432,50 +602,254 @@ FOR EACH SLIDE, PROVIDE:
 - speaker_notes: Detailed speaker notes (2-3 sentences)
 - layout: "full_image" | "left_image" | "right_image" | "top_image" | "no_image"
 
-Return ONLY valid JSON array of slides. Make it PROFESSIONAL and ENGAGING.
+Return ONLY a valid JSON object {{"items": [...]}} where items is the array of slides. Make it PROFESSIONAL and ENGAGING.
 Use the {style} style - adjust tone and formality accordingly."""
 
+TOPIC_STRUCTURE_PROMPT = """You are generating a professional slide deck from a document.
+
+DOCUMENT CONTENT:
+{content}
+
+GOAL:
+- Extract the most important topics from the document.
+- Each topic becomes ONE slide.
+
+HARD RULES:
+- Do NOT create a title slide, agenda slide, summary slide, or closing slide.
+- Do NOT include any author name, presenter name, company name, or speaker notes.
+- Do NOT include any text like "AI Generated".
+- Slide titles must be the extracted topics.
+
+FOR EACH SLIDE RETURN THESE FIELDS:
+- slide_type: must be "topic"
+- title: topic heading
+- overview: 1–2 sentence professional explanation
+- blocks: 2–3 short labels (3–6 words) for key sub-ideas
+- bullet_points: 3–5 concise bullets
+- image_prompt: a DALL-E prompt for a clean educational visual (NO TEXT)
+- table: optional object with title, headers, rows (use when comparison/structured data fits)
+- diagram_type: optional one of "flowchart"|"timeline"|"comparison"|"hierarchy"|"cycle"|null
+- diagram_data: Mermaid code when diagram_type is set (NO markdown fences)
+- layout: always "right_image"
+
+QUALITY RULES:
+- Ensure the overall deck contains at least ONE slide with a table and at least ONE slide with a diagram when the content allows.
+- Avoid fluff; be accurate to the document.
+
+Return ONLY a valid JSON object {{"items": [...]}} where items is an array of up to {max_topics} slides.
+Use the {style} tone/style."""
+
+# =============================================================================
+# WEB SEARCH FOR ENHANCED PRESENTATIONS
+# =============================================================================
+
+def search_web_for_topic(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+    """Search the web using DuckDuckGo for relevant information"""
+    
+    if not SEARCH_ENABLED:
+        log.warning('[Search] Web search not available')
+        return []
+    
+    key = cache_key('search', f'{max_results}:{query}'.encode('utf-8'))
+    return cached_call(key, lambda: _search_duckduckgo(query, max_results))
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts of `burst`"""
+    
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take a token, sleeping until one is available; a rate of 0 disables the limit"""
+        if self._rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            # Reserve the token now so concurrent callers queue up behind it
+            wait = (1 - self._tokens) / self._rate if self._tokens < 1 else 0
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+
+# Searches fan out in parallel, so pace the uncached ones to keep DuckDuckGo from
+# rate-limiting this host
+SEARCH_RATE_PER_SEC = float(os.environ.get('SEARCH_RATE_PER_SEC', '10'))
+_search_limiter = RateLimiter(SEARCH_RATE_PER_SEC, burst=5)
+
+# DDGS brings its own HTTP client rather than taking a requests.Session, so keep
+# one per thread; its keep-alive connections then outlive a single query
+_ddgs_local = threading.local()
+
+def _get_ddgs():
+    """Return this thread's DDGS client, creating it on first use"""
+    from duckduckgo_search import DDGS
+    
+    ddgs = getattr(_ddgs_local, 'ddgs', None)
+    if ddgs is None:
+        ddgs = _ddgs_local.ddgs = DDGS()
+    return ddgs
+
+def _search_duckduckgo(query: str, max_results: int) -> List[Dict[str, str]]:
+    """Run one uncached DuckDuckGo text search"""
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o',
-                'messages': [
-                    {'role': 'system', 'content': 'You are an expert presentation designer. Create visually stunning, professional presentations. Return only valid JSON.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.7,
-                'max_tokens': 4096
-            },
-            timeout=60
+        ddgs = _get_ddgs()
+        
+        _search_limiter.acquire()
+        log.debug('[Search] Searching for: %s', query)
+        results = []
+        for r in ddgs.text(query, max_results=max_results):
+            results.append({
+                'title': r.get('title', ''),
+                'body': r.get('body', ''),
+                'url': r.get('href', '')
+            })
+        log.debug('[Search] Found %s results', len(results))
+        return results
+    except Exception as e:
+        log.error('[Search] Error: %s', e)
+        # Start the next search on this thread with a fresh client
+        _ddgs_local.ddgs = None
+        return []
+
+# Searches are blocking network round trips, so a small shared pool fans them out
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', '8'))
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+
+def _url_key(url: str) -> str:
+    """Normalize a result URL so trivially different links to one page compare equal"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return f"{host}{parts.path.rstrip('/')}?{parts.query}"
+
+def search_web_for_queries(queries: List[str], max_results: int = 3) -> List[Dict[str, str]]:
+    """Search all queries concurrently; results keep query order, deduplicated by URL"""
+    
+    if not queries:
+        return []
+    
+    grouped = _search_pool.map(lambda query: search_web_for_topic(query, max_results=max_results), queries)
+    
+    # Overlapping queries often return the same pages; every duplicate that
+    # reaches the structure prompt is wasted GPT-4o input tokens
+    results = []
+    seen_urls = set()
+    total = 0
+    for group in grouped:
+        for result in group:
+            total += 1
+            url = result.get('url')
+            if url:
+                key = _url_key(url)
+                if key in seen_urls:
+                    continue
+                seen_urls.add(key)
+            results.append(result)
+    log.info('[Search] %s results, %s after removing duplicate URLs', total, len(results))
+    return results
+
+def extract_search_queries_from_content(content: str, slide_count: int = 10) -> List[str]:
+    """Use GPT-4o to extract relevant search queries from document content"""
+    
+    # Queries are only useful if we can run them; skip the GPT-4o round trip
+    if not SEARCH_ENABLED:
+        log.warning('[Search] Web search not available, skipping query extraction')
+        return []
+    
+    prompt = SEARCH_QUERIES_PROMPT.format(
+        query_count=min(slide_count - 2, 5),
+        content=content[:8000]
+    )
+
+    try:
+        queries = openai_chat_json(
+            'You are a research assistant. Extract relevant search queries. Return only valid JSON.',
+            prompt,
+            temperature=0.7,
+            max_tokens=500,
+            timeout=30,
+            label='Search',
+            item_type=str
         )
+        log.info('[Search] Extracted %s search queries', len(queries))
+        return queries if isinstance(queries, list) else []
         
-        result = response.json()
-        
-        # Check for API errors
-        if 'error' in result:
-            raise Exception(f"OpenAI API error: {result['error'].get('message', 'Unknown error')}")
-        
-        content = result['choices'][0]['message']['content']
-        print(f'[GPT-4o] Raw response length: {len(content)}')
+    except Exception as e:
+        log.error('[Search] Error extracting queries: %s', e)
+        return []
+
+def generate_enhanced_slide_structure(content: str, slide_count: int = 10, style: str = 'professional', web_results: List[Dict] = None) -> List[Dict]:
+    """Generate slide structure enriched with web search results"""
+    
+    # Prepare web search context
+    web_context = ""
+    if web_results:
+        web_context = "\n\nADDITIONAL RESEARCH DATA FROM WEB:\n" + "".join(
+            f"\n{i}. {result.get('title', '')}\n{result.get('body', '')[:200]}...\nSource: {result.get('url', '')}\n"
+            for i, result in enumerate(web_results[:10], 1)
+        )
+    
+    prompt = ENHANCED_STRUCTURE_PROMPT.format(
+        slide_count=slide_count,
+        content=content[:12000],
+        web_context=web_context,
+        style=style
+    )
+
+    try:
+        slides = openai_chat_json(
+            'You are an expert presentation designer and researcher. Create stunning, professional, data-driven presentations. Return only valid JSON.',
+            prompt,
+            temperature=0.7,
+            max_tokens=4096,
+            timeout=90,
+            label='GPT-4o Enhanced'
+        )
+        log.info('[GPT-4o Enhanced] Parsed %s slides', len(slides))
+        return slides
         
-        # Parse JSON from response
-        json_match = content
-        if '```json' in content:
-            json_match = content.split('```json')[1].split('```')[0]
-        elif '```' in content:
-            json_match = content.split('```')[1].split('```')[0]
+    except Exception as e:
+        log.error('[GPT-4o Enhanced] Error: %s', e)
+        import traceback
+        traceback.print_exc()
         
-        slides = json.loads(json_match.strip())
-        print(f'[GPT-4o] Parsed {len(slides)} slides')
+        # Fallback to basic structure
+        return generate_slide_structure(content, slide_count, style)
+
+# =============================================================================
+# GPT-4O SLIDE STRUCTURE GENERATION
+# =============================================================================
+
+def generate_slide_structure(content: str, slide_count: int = 10, style: str = 'professional') -> List[Dict]:
+    """Use GPT-4o to generate optimal slide structure from document content"""
+    
+    prompt = SLIDE_STRUCTURE_PROMPT.format(
+        slide_count=slide_count,
+        content=content[:15000],
+        style=style
+    )
+
+    try:
+        slides = openai_chat_json(
+            'You are an expert presentation designer. Create visually stunning, professional presentations. Return only valid JSON.',
+            prompt,
+            temperature=0.7,
+            max_tokens=4096,
+            timeout=60,
+            label='GPT-4o'
+        )
+        log.info('[GPT-4o] Parsed %s slides', len(slides))
         return slides
         
     except Exception as e:
-        print(f'[GPT-4o] Error generating structure: {e}')
+        log.error('[GPT-4o] Error generating structure: %s', e)
         import traceback
         traceback.print_exc()
         
@@ -509,6 +883,25 @@ Use the {style} style - adjust tone and formality accordingly."""
         return fallback_slides[:slide_count]
 
 
+def _normalize_topic_slide(s: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce one GPT-4o topic slide into the fields the deck builder expects"""
+    blocks = s.get('blocks')
+    bullet_points = s.get('bullet_points')
+    table = s.get('table')
+    diagram_data = s.get('diagram_data')
+    return {
+        'slide_type': 'topic',
+        'title': str(s.get('title', '')).strip(),
+        'overview': str(s.get('overview', '')).strip(),
+        'blocks': blocks if isinstance(blocks, list) else [],
+        'bullet_points': bullet_points if isinstance(bullet_points, list) else [],
+        'image_prompt': str(s.get('image_prompt', '')).strip(),
+        'table': table if isinstance(table, dict) else None,
+        'diagram_type': s.get('diagram_type'),
+        'diagram_data': str(diagram_data).strip() if diagram_data else None,
+        'layout': 'right_image',
+    }
+
 def generate_topic_slide_structure(content: str, max_topics: int = 10, style: str = 'professional') -> List[Dict]:
     """Generate a deck where each document topic becomes a slide heading.
 
@@ -519,90 +912,27 @@ def generate_topic_slide_structure(content: str, max_topics: int = 10, style: st
     - Each slide includes: image + blocks + text, plus optional table/diagram when relevant
     """
 
-    prompt = f"""You are generating a professional slide deck from a document.
-
-DOCUMENT CONTENT:
-{content[:15000]}
-
-GOAL:
-- Extract the most important topics from the document.
-- Each topic becomes ONE slide.
-
-HARD RULES:
-- Do NOT create a title slide, agenda slide, summary slide, or closing slide.
-- Do NOT include any author name, presenter name, company name, or speaker notes.
-- Do NOT include any text like "AI Generated".
-- Slide titles must be the extracted topics.
-
-FOR EACH SLIDE RETURN THESE FIELDS:
-- slide_type: must be "topic"
-- title: topic heading
-- overview: 1–2 sentence professional explanation
-- blocks: 2–3 short labels (3–6 words) for key sub-ideas
-- bullet_points: 3–5 concise bullets
-- image_prompt: a DALL-E prompt for a clean educational visual (NO TEXT)
-- table: optional object with title, headers, rows (use when comparison/structured data fits)
-- diagram_type: optional one of "flowchart"|"timeline"|"comparison"|"hierarchy"|"cycle"|null
-- diagram_data: Mermaid code when diagram_type is set (NO markdown fences)
-- layout: always "right_image"
-
-QUALITY RULES:
-- Ensure the overall deck contains at least ONE slide with a table and at least ONE slide with a diagram when the content allows.
-- Avoid fluff; be accurate to the document.
-
-Return ONLY a valid JSON array with up to {max_topics} slides.
-Use the {style} tone/style."""
+    prompt = TOPIC_STRUCTURE_PROMPT.format(
+        content=content[:15000],
+        max_topics=max_topics,
+        style=style
+    )
 
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o',
-                'messages': [
-                    {'role': 'system', 'content': 'You are an expert presentation designer. Return only valid JSON.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.5,
-                'max_tokens': 4096
-            },
-            timeout=75
+        slides = openai_chat_json(
+            'You are an expert presentation designer. Return only valid JSON.',
+            prompt,
+            temperature=0.5,
+            max_tokens=4096,
+            timeout=75,
+            label='GPT-4o Topics'
         )
-
-        result = response.json()
-        if 'error' in result:
-            raise Exception(f"OpenAI API error: {result['error'].get('message', 'Unknown error')}")
-
-        content_text = result['choices'][0]['message']['content']
-        json_match = content_text
-        if '```json' in content_text:
-            json_match = content_text.split('```json')[1].split('```')[0]
-        elif '```' in content_text:
-            json_match = content_text.split('```')[1].split('```')[0]
-
-        slides = json.loads(json_match.strip())
         if not isinstance(slides, list):
             raise Exception('Invalid JSON response (not an array)')
 
-        normalized: List[Dict[str, Any]] = []
-        for s in slides[:max_topics]:
-            if not isinstance(s, dict):
-                continue
-            normalized.append({
-                'slide_type': 'topic',
-                'title': str(s.get('title', '')).strip(),
-                'overview': str(s.get('overview', '')).strip(),
-                'blocks': s.get('blocks', []) if isinstance(s.get('blocks'), list) else [],
-                'bullet_points': s.get('bullet_points', []) if isinstance(s.get('bullet_points'), list) else [],
-                'image_prompt': str(s.get('image_prompt', '')).strip(),
-                'table': s.get('table') if isinstance(s.get('table'), dict) else None,
-                'diagram_type': s.get('diagram_type'),
-                'diagram_data': str(s.get('diagram_data', '')).strip() if s.get('diagram_data') else None,
-                'layout': 'right_image',
-            })
+        normalized: List[Dict[str, Any]] = [
+            _normalize_topic_slide(s) for s in slides[:max_topics] if isinstance(s, dict)
+        ]
 
         if len(normalized) == 0:
             raise Exception('No slides returned')
@@ -610,7 +940,7 @@ Use the {style} tone/style."""
         return normalized
 
     except Exception as e:
-        print(f'[GPT-4o Topics] Error generating topic structure: {e}')
+        log.error('[GPT-4o Topics] Error generating topic structure: %s', e)
         return [
             {
                 'slide_type': 'topic',
@@ -630,29 +960,41 @@ Use the {style} tone/style."""
 # DALL-E 3 IMAGE GENERATION
 # =============================================================================
 
-def generate_image_dalle(prompt: str, style: str = 'professional', size: str = '1792x1024') -> Optional[str]:
+# Read-only so the shared table can't drift between the image generators
+_STYLE_MODIFIERS = MappingProxyType({
+    'professional': 'professional corporate style, clean modern design, subtle colors',
+    'modern': 'modern minimalist style, bold geometric shapes, vibrant gradients',
+    'minimal': 'minimal clean style, lots of white space, simple elegant',
+    'creative': 'creative colorful style, dynamic composition, artistic flair',
+    'dark': 'dark moody style, dramatic lighting, sleek modern',
+    'academic': 'academic scholarly style, classic elegant, sophisticated',
+    'startup': 'startup tech style, innovative dynamic, energetic modern',
+    'education': 'educational friendly style, warm inviting, clear informative',
+})
+
+def _style_suffixes(quality_tail: str) -> MappingProxyType:
+    """Precompute the style-and-quality suffix appended to image prompts, per style"""
+    return MappingProxyType({
+        key: sys.intern(f". Style: {modifier}. {quality_tail}")
+        for key, modifier in _STYLE_MODIFIERS.items()
+    })
+
+_DALLE_SUFFIX = _style_suffixes('High quality, 4K, professional presentation slide image.')
+_GPT_IMAGE_SUFFIX = _style_suffixes('High quality, realistic, professional presentation slide image.')
+
+def generate_image_dalle(prompt: str, style: str = 'professional', size: str = '1792x1024') -> Optional[bytes]:
     """Generate image using DALL-E 3"""
-    
-    style_modifiers = {
-        'professional': 'professional corporate style, clean modern design, subtle colors',
-        'modern': 'modern minimalist style, bold geometric shapes, vibrant gradients',
-        'minimal': 'minimal clean style, lots of white space, simple elegant',
-        'creative': 'creative colorful style, dynamic composition, artistic flair',
-        'dark': 'dark moody style, dramatic lighting, sleek modern',
-        'academic': 'academic scholarly style, classic elegant, sophisticated',
-        'startup': 'startup tech style, innovative dynamic, energetic modern',
-        'education': 'educational friendly style, warm inviting, clear informative',
-    }
-    
-    full_prompt = f"{prompt}. Style: {style_modifiers.get(style, style_modifiers['professional'])}. High quality, 4K, professional presentation slide image."
+    key = cache_key('image-bytes', f'dall-e-3|{style}|{size}|{prompt}'.encode('utf-8'))
+    return cached_call(key, lambda: _request_image_dalle(prompt, style, size))
+
+def _request_image_dalle(prompt: str, style: str, size: str) -> Optional[bytes]:
+    """Request one DALL-E 3 image, uncached"""
+    full_prompt = prompt + _DALLE_SUFFIX.get(style, _DALLE_SUFFIX['professional'])
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             'https://api.openai.com/v1/images/generations',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
+            headers=OPENAI_HEADERS,
             json={
                 'model': 'dall-e-3',
                 'prompt': full_prompt,
@@ -664,46 +1006,36 @@ def generate_image_dalle(prompt: str, style: str = 'professional', size: str = '
             timeout=60
         )
         
-        result = response.json()
+        result = orjson.loads(response.content)
         if 'data' in result and len(result['data']) > 0:
             image_url = result['data'][0]['url']
             
-            # Download and convert to base64
-            img_response = requests.get(image_url, timeout=30)
+            # Download the raw image bytes
+            img_response = SESSION.get(image_url, timeout=30)
             if img_response.status_code == 200:
-                return base64.b64encode(img_response.content).decode('utf-8')
+                return img_response.content
         
         return None
         
     except Exception as e:
-        print(f'[DALL-E 3] Error generating image: {e}')
+        log.error('[DALL-E 3] Error generating image: %s', e)
         return None
 
 
-def generate_image_nano_banana(prompt: str, style: str = 'professional', size: str = '1024x1024') -> Optional[str]:
+def generate_image_nano_banana(prompt: str, style: str = 'professional', size: str = '1024x1024') -> Optional[bytes]:
     """Generate image using OpenAI gpt-image-1 (labeled as 'Nano Banana' in the app)."""
+    key = cache_key('image-bytes', f'gpt-image-1|{style}|{size}|{prompt}'.encode('utf-8'))
+    return cached_call(key, lambda: _request_image_nano_banana(prompt, style, size))
 
-    # Reuse the same style modifiers as DALL·E for consistent aesthetics.
-    style_modifiers = {
-        'professional': 'professional corporate style, clean modern design, subtle colors',
-        'modern': 'modern minimalist style, bold geometric shapes, vibrant gradients',
-        'minimal': 'minimal clean style, lots of white space, simple elegant',
-        'creative': 'creative colorful style, dynamic composition, artistic flair',
-        'dark': 'dark moody style, dramatic lighting, sleek modern',
-        'academic': 'academic scholarly style, classic elegant, sophisticated',
-        'startup': 'startup tech style, innovative dynamic, energetic modern',
-        'education': 'educational friendly style, warm inviting, clear informative',
-    }
-
-    full_prompt = f"{prompt}. Style: {style_modifiers.get(style, style_modifiers['professional'])}. High quality, realistic, professional presentation slide image."
+def _request_image_nano_banana(prompt: str, style: str, size: str) -> Optional[bytes]:
+    """Request one gpt-image-1 image, uncached"""
+    # Same style modifiers as DALL·E for consistent aesthetics
+    full_prompt = prompt + _GPT_IMAGE_SUFFIX.get(style, _GPT_IMAGE_SUFFIX['professional'])
 
     try:
-        response = requests.post(
+        response = SESSION.post(
             'https://api.openai.com/v1/images/generations',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
+            headers=OPENAI_HEADERS,
             json={
                 'model': 'gpt-image-1',
                 'prompt': full_prompt,
@@ -715,42 +1047,54 @@ def generate_image_nano_banana(prompt: str, style: str = 'professional', size: s
 
         # If the account doesn't have gpt-image-1 access, fall back gracefully.
         if response.status_code in (400, 401, 403):
-            print(f'[Nano Banana] gpt-image-1 not available (status={response.status_code}); falling back to DALL-E 3')
+            log.warning('[Nano Banana] gpt-image-1 not available (status=%s); falling back to DALL-E 3', response.status_code)
             return generate_image_dalle(prompt, style, size='1792x1024')
 
-        result = response.json()
+        result = orjson.loads(response.content)
         if 'data' in result and len(result['data']) > 0:
-            # Prefer base64 if present.
+            # Prefer base64 if present; decode it once here.
             b64 = result['data'][0].get('b64_json')
             if b64:
-                return b64
+                return pybase64.b64decode(b64)
 
             image_url = result['data'][0].get('url')
             if image_url:
-                img_response = requests.get(image_url, timeout=30)
+                img_response = SESSION.get(image_url, timeout=30)
                 if img_response.status_code == 200:
-                    return base64.b64encode(img_response.content).decode('utf-8')
+                    return img_response.content
 
         return None
     except Exception as e:
-        print(f'[Nano Banana] Error generating image: {e}')
+        log.error('[Nano Banana] Error generating image: %s', e)
         return None
 
 
-def generate_image_midjourney(prompt: str, style: str = 'professional') -> Optional[str]:
+def refresh_midjourney_config():
+    """Re-read the Midjourney proxy settings from the environment"""
+    global _MIDJOURNEY_KEY, _MIDJOURNEY_URL, _MIDJOURNEY_ENABLED
+    _MIDJOURNEY_KEY = (os.environ.get('MIDJOURNEY_API_KEY', '') or '').strip()
+    _MIDJOURNEY_URL = (os.environ.get('MIDJOURNEY_API_URL', '') or '').strip()
+    _MIDJOURNEY_ENABLED = bool(_MIDJOURNEY_KEY and _MIDJOURNEY_URL)
+
+# Resolved once per process; premium decks otherwise re-read both variables per slide
+refresh_midjourney_config()
+
+def generate_image_midjourney(prompt: str, style: str = 'professional') -> Optional[bytes]:
     """Generate image using Midjourney (optional).
 
     This code path is only used when MIDJOURNEY_API_KEY and MIDJOURNEY_API_URL are configured.
     If not configured (or the call fails), callers should fall back to DALL·E.
     """
-
-    api_key = (MIDJOURNEY_API_KEY or '').strip()
-    api_url = (os.environ.get('MIDJOURNEY_API_URL', '') or '').strip()
-    if not api_key or not api_url:
+    if not _MIDJOURNEY_ENABLED:
         return None
 
+    key = cache_key('image-bytes', f'midjourney|{style}|{prompt}'.encode('utf-8'))
+    return cached_call(key, lambda: _request_image_midjourney(_MIDJOURNEY_URL, _MIDJOURNEY_KEY, prompt, style))
+
+def _request_image_midjourney(api_url: str, api_key: str, prompt: str, style: str) -> Optional[bytes]:
+    """Request one Midjourney image through the configured proxy, uncached"""
     try:
-        resp = requests.post(
+        resp = SESSION.post(
             api_url,
             headers={
                 'Authorization': f'Bearer {api_key}',
@@ -763,7 +1107,7 @@ def generate_image_midjourney(prompt: str, style: str = 'professional') -> Optio
             timeout=120
         )
         if resp.status_code != 200:
-            print(f'[Midjourney] Non-OK status: {resp.status_code}')
+            log.warning('[Midjourney] Non-OK status: %s', resp.status_code)
             return None
 
         data = resp.json() if resp.text else {}
@@ -771,55 +1115,171 @@ def generate_image_midjourney(prompt: str, style: str = 'professional') -> Optio
         # Support either base64 or url payloads.
         b64 = data.get('b64') or data.get('base64') or data.get('image_base64')
         if isinstance(b64, str) and b64.strip():
-            return b64.strip()
+            return pybase64.b64decode(b64.strip())
 
         url = data.get('url') or data.get('image_url')
         if isinstance(url, str) and url.strip():
-            img_response = requests.get(url.strip(), timeout=60)
+            img_response = SESSION.get(url.strip(), timeout=60)
             if img_response.status_code == 200:
-                return base64.b64encode(img_response.content).decode('utf-8')
+                return img_response.content
 
         return None
     except Exception as e:
-        print(f'[Midjourney] Error generating image: {e}')
+        log.error('[Midjourney] Error generating image: %s', e)
         return None
 
+def generate_slide_image(prompt: str, style: str, mode: str) -> Optional[bytes]:
+    """Generate a slide image with the generator selected by image_mode"""
+    
+    if mode in ('realism', 'enhance_realism', 'enhanced_realism', 'nano_banana', 'nanobanana'):
+        return generate_image_nano_banana(prompt, style)
+    if mode in ('premium', 'premium_visuals', 'midjourney'):
+        # Optional: only works if env vars are configured.
+        return generate_image_midjourney(prompt, style) or generate_image_dalle(prompt, style)
+    # Default
+    return generate_image_dalle(prompt, style)
+
+# Image and diagram calls are slow, blocking round trips; a shared pool runs a
+# deck's worth of them concurrently and caps the load on the image APIs
+MEDIA_WORKERS = int(os.environ.get('MEDIA_WORKERS', '8'))
+_media_pool = ThreadPoolExecutor(max_workers=MEDIA_WORKERS)
+
 # =============================================================================
 # MERMAID DIAGRAM GENERATION
 # =============================================================================
 
-def generate_mermaid_diagram(diagram_type: str, diagram_data: str) -> Optional[str]:
+# Local mermaid-cli renders without a network round trip; mermaid.ink is the fallback
+MERMAID_CLI = os.environ.get('MERMAID_CLI') or shutil.which('mmdc')
+MERMAID_CLI_TIMEOUT = int(os.environ.get('MERMAID_CLI_TIMEOUT', '30'))
+_MERMAID_INK_URL = 'https://mermaid.ink/img/{}?type=png&bgColor=transparent'
+
+def generate_mermaid_diagram(diagram_type: str, diagram_data: str) -> Optional[bytes]:
     """Generate diagram image from Mermaid code"""
     
+    # Rendering is deterministic, so the Mermaid source alone is the key
+    mermaid_code = diagram_data.strip()
+    key = cache_key('mermaid-bytes', mermaid_code.encode('utf-8'))
+    return cached_call(key, lambda: _render_mermaid(mermaid_code))
+
+def _render_mermaid(mermaid_code: str) -> Optional[bytes]:
+    """Render Mermaid code to a PNG, uncached"""
+    if MERMAID_CLI:
+        png = _render_mermaid_cli(mermaid_code)
+        if png:
+            return png
+    
     try:
         # Use Mermaid.ink API to render diagram
-        mermaid_code = diagram_data.strip()
-        encoded = base64.b64encode(mermaid_code.encode('utf-8')).decode('utf-8')
-        
-        # Mermaid.ink API
-        url = f'https://mermaid.ink/img/{encoded}?type=png&bgColor=transparent'
-        
-        response = requests.get(url, timeout=30)
+        encoded = pybase64.b64encode_as_string(mermaid_code.encode('utf-8'))
+        response = SESSION.get(_MERMAID_INK_URL.format(encoded), timeout=30)
         if response.status_code == 200:
-            return base64.b64encode(response.content).decode('utf-8')
+            return response.content
         
         return None
         
     except Exception as e:
-        print(f'[Mermaid] Error generating diagram: {e}')
+        log.error('[Mermaid] Error generating diagram: %s', e)
         return None
 
+def _render_mermaid_cli(mermaid_code: str) -> Optional[bytes]:
+    """Render Mermaid code with the local mermaid-cli (mmdc)"""
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            src_path = os.path.join(tmp_dir, 'diagram.mmd')
+            out_path = os.path.join(tmp_dir, 'diagram.png')
+            with open(src_path, 'w', encoding='utf-8') as f:
+                f.write(mermaid_code)
+            
+            subprocess.run(
+                [MERMAID_CLI, '-i', src_path, '-o', out_path, '-b', 'transparent'],
+                check=True,
+                capture_output=True,
+                timeout=MERMAID_CLI_TIMEOUT
+            )
+            with open(out_path, 'rb') as f:
+                return f.read()
+    except Exception as e:
+        log.warning('[Mermaid] mermaid-cli failed, falling back to mermaid.ink: %s', e)
+        return None
+
+def _wants_image(slide_data: Dict) -> bool:
+    """Whether a slide asks for a generated image"""
+    return bool(slide_data.get('image_prompt')) and slide_data.get('layout', 'no_image') != 'no_image'
+
+def _wants_diagram(slide_data: Dict) -> bool:
+    """Whether a slide asks for a Mermaid diagram"""
+    return bool(slide_data.get('diagram_type') and slide_data.get('diagram_data'))
+
+def submit_media_batch(
+    slides: List[Dict],
+    style_name: str,
+    include_images: bool,
+    image_mode: str,
+    include_diagrams: bool = True
+) -> Tuple[Dict[int, Future], Dict[int, Future]]:
+    """Start every image and diagram request for a deck at once, keyed by slide index"""
+    
+    image_jobs = {}
+    diagram_jobs = {}
+    include_images = include_images and any(_wants_image(s) for s in slides)
+    include_diagrams = include_diagrams and any(_wants_diagram(s) for s in slides)
+    if not include_images and not include_diagrams:
+        return image_jobs, diagram_jobs
+    
+    # The image APIs only take n>1 for a single prompt, so per-slide prompts
+    # can't share a call; instead all of them go out together on the media pool
+    # and run side by side while the caller builds the slides
+    mode = (image_mode or 'default').strip().lower() if include_images else None
+    # Slides repeating a prompt or diagram share one request, so they get the
+    # same bytes back and python-pptx stores a single image part for all of them
+    requested = {}
+    for i, slide_data in enumerate(slides):
+        if include_images and _wants_image(slide_data):
+            key = ('image', slide_data['image_prompt'])
+            if key not in requested:
+                requested[key] = _media_pool.submit(generate_slide_image, slide_data['image_prompt'], style_name, mode)
+            image_jobs[i] = requested[key]
+        if include_diagrams and _wants_diagram(slide_data):
+            key = ('diagram', slide_data['diagram_data'].strip())
+            if key not in requested:
+                requested[key] = _media_pool.submit(generate_mermaid_diagram, slide_data['diagram_type'], slide_data['diagram_data'])
+            diagram_jobs[i] = requested[key]
+    
+    return image_jobs, diagram_jobs
+
 # =============================================================================
 # PPTX GENERATION
 # =============================================================================
 
-def hex_to_rgb(hex_color: str) -> RGBColor:
+# Styles only use a handful of colors; RGBColor is an immutable tuple, so each
+# hex string is parsed once per process and the same object is reused
+@lru_cache(maxsize=256)
+def hex_to_rgb(hex_color: str) -> 'RGBColor':
     """Convert hex color to RGBColor"""
-    hex_color = hex_color.lstrip('#')
-    return RGBColor(
-        int(hex_color[0:2], 16),
-        int(hex_color[2:4], 16),
-        int(hex_color[4:6], 16)
+    from pptx.dml.color import RGBColor
+    
+    return RGBColor.from_string(hex_color.lstrip('#'))
+
+@dataclass(frozen=True, slots=True)
+class SlideColors:
+    """A presentation style's colors, already converted to RGBColor"""
+    primary: 'RGBColor'
+    secondary: 'RGBColor'
+    accent: 'RGBColor'
+    background: 'RGBColor'
+    text: 'RGBColor'
+    table_stripe: 'RGBColor'
+
+@lru_cache(maxsize=None)
+def resolve_slide_colors(style: PresentationStyle) -> SlideColors:
+    """Resolve every color of a style once so slide builders skip the hex parsing"""
+    return SlideColors(
+        primary=hex_to_rgb(style.primary_color),
+        secondary=hex_to_rgb(style.secondary_color),
+        accent=hex_to_rgb(style.accent_color),
+        background=hex_to_rgb(style.background),
+        text=hex_to_rgb(style.text_color),
+        table_stripe=hex_to_rgb('F3F4F6'),
     )
 
 def create_presentation(
@@ -827,11 +1287,28 @@ def create_presentation(
     style_name: str = 'professional',
     include_images: bool = True,
     include_notes: bool = True,
-    image_mode: str = 'default'
+    image_mode: str = 'default',
+    include_diagrams: bool = True
 ) -> bytes:
-    """Create PPTX from slide structure"""
+    """Create PPTX from slide structure and return it as bytes"""
+    pptx_bytes = io.BytesIO()
+    write_presentation(pptx_bytes, slides, style_name, include_images, include_notes, image_mode, include_diagrams)
+    return pptx_bytes.getvalue()
+
+def write_presentation(
+    output: Union[str, IO[bytes]],
+    slides: List[Dict],
+    style_name: str = 'professional',
+    include_images: bool = True,
+    include_notes: bool = True,
+    image_mode: str = 'default',
+    include_diagrams: bool = True
+):
+    """Create PPTX from slide structure and save it to a path or binary stream"""
+    from pptx import Presentation
+    from pptx.util import Inches
     
-    style = PRESENTATION_STYLES.get(style_name, PRESENTATION_STYLES['professional'])
+    colors = resolve_slide_colors(get_style(style_name))
     
     prs = Presentation()
     # Avoid unprofessional metadata like an 'Author' showing up in PPT properties
@@ -845,8 +1322,11 @@ def create_presentation(
     prs.slide_width = Inches(13.333)  # 16:9
     prs.slide_height = Inches(7.5)
     
+    # Images and diagrams download while the slides below are built
+    image_jobs, diagram_jobs = submit_media_batch(slides, style_name, include_images, image_mode, include_diagrams)
+    
     for i, slide_data in enumerate(slides):
-        print(f'[PPTX] Creating slide {i+1}: {slide_data.get("slide_type", "content")}')
+        log.debug('[PPTX] Creating slide %s: %s', i+1, slide_data.get('slide_type', 'content'))
         
         slide_type = slide_data.get('slide_type', 'content')
         layout = slide_data.get('layout', 'no_image')
@@ -859,257 +1339,245 @@ def create_presentation(
         background = slide.background
         fill = background.fill
         fill.solid()
-        fill.fore_color.rgb = hex_to_rgb(style['background'])
+        fill.fore_color.rgb = colors.background
         
         # Handle different slide types
         if slide_type == 'title':
-            create_title_slide(slide, slide_data, style)
+            create_title_slide(slide, slide_data, colors)
         elif slide_type == 'closing':
-            create_closing_slide(slide, slide_data, style)
+            create_closing_slide(slide, slide_data, colors)
         elif slide_type == 'agenda':
-            create_agenda_slide(slide, slide_data, style)
+            create_agenda_slide(slide, slide_data, colors)
         elif slide_type == 'two_column':
-            create_two_column_slide(slide, slide_data, style)
+            create_two_column_slide(slide, slide_data, colors)
         elif slide_type == 'quote':
-            create_quote_slide(slide, slide_data, style)
+            create_quote_slide(slide, slide_data, colors)
         elif slide_type == 'summary':
-            create_summary_slide(slide, slide_data, style)
+            create_summary_slide(slide, slide_data, colors)
         elif slide_type == 'topic':
-            create_topic_slide(slide, slide_data, style)
+            create_topic_slide(slide, slide_data, colors)
         else:
-            create_content_slide(slide, slide_data, style, layout)
-        
-        # Generate and add image if needed
-        if include_images and slide_data.get('image_prompt') and layout != 'no_image':
-            mode = (image_mode or 'default').strip().lower()
-            image_base64 = None
-
-            if mode in ('realism', 'enhance_realism', 'enhanced_realism', 'nano_banana', 'nanobanana'):
-                image_base64 = generate_image_nano_banana(slide_data['image_prompt'], style_name)
-            elif mode in ('premium', 'premium_visuals', 'midjourney'):
-                # Optional: only works if env vars are configured.
-                image_base64 = generate_image_midjourney(slide_data['image_prompt'], style_name)
-                if not image_base64:
-                    image_base64 = generate_image_dalle(slide_data['image_prompt'], style_name)
-            else:
-                # Default
-                image_base64 = generate_image_dalle(slide_data['image_prompt'], style_name)
-
-            if image_base64:
-                add_image_to_slide(slide, image_base64, layout)
+            create_content_slide(slide, slide_data, colors, layout)
         
-        # Generate and add diagram if needed
-        if slide_data.get('diagram_type') and slide_data.get('diagram_data'):
-            diagram_base64 = generate_mermaid_diagram(
-                slide_data['diagram_type'],
-                slide_data['diagram_data']
-            )
-            if diagram_base64:
-                add_diagram_to_slide(slide, diagram_base64)
+        # Add image and diagram once their background requests finish
+        if i in image_jobs:
+            image_bytes = image_jobs[i].result()
+            if image_bytes:
+                add_image_to_slide(slide, image_bytes, layout)
+        
+        if i in diagram_jobs:
+            diagram_bytes = diagram_jobs[i].result()
+            if diagram_bytes:
+                add_diagram_to_slide(slide, diagram_bytes)
         
         # Add speaker notes (optional)
         if include_notes and slide_data.get('speaker_notes'):
             notes_slide = slide.notes_slide
             notes_slide.notes_text_frame.text = slide_data['speaker_notes']
     
-    # Save to bytes
-    pptx_bytes = io.BytesIO()
-    prs.save(pptx_bytes)
-    pptx_bytes.seek(0)
-    
-    return pptx_bytes.getvalue()
+    # Saving straight to the destination avoids holding the whole deck in memory twice
+    prs.save(output)
+
+# Text-only decks are pure CPU work. With PPTX_PROCESS_WORKERS > 0 they are built
+# in a separate process so a long build doesn't hold this worker's GIL while it
+# serves other requests. Decks with images or diagrams stay in-process, where the
+# media pool fetches them while the slides are built. Splitting one deck's slides
+# across processes isn't worth it: shape ids and image relationships are per
+# slide part, and a whole text deck builds in well under a second.
+PPTX_PROCESS_WORKERS = int(os.environ.get('PPTX_PROCESS_WORKERS', '0'))
+_pptx_process_pool = None
+_pptx_process_pool_lock = threading.Lock()
+
+def _get_pptx_process_pool() -> ProcessPoolExecutor:
+    """Create the build process pool on first use, after gunicorn has forked"""
+    global _pptx_process_pool
+    with _pptx_process_pool_lock:
+        if _pptx_process_pool is None:
+            # spawn, not fork: forked children would inherit this process's
+            # thread pools without their threads
+            _pptx_process_pool = ProcessPoolExecutor(
+                max_workers=PPTX_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pptx_process_pool
 
-def create_title_slide(slide, data: Dict, style: Dict):
+def save_presentation(
+    filepath: str,
+    slides: List[Dict],
+    style_name: str = 'professional',
+    include_images: bool = True,
+    include_notes: bool = True,
+    image_mode: str = 'default',
+    include_diagrams: bool = True
+):
+    """Write a PPTX to filepath, building text-only decks in the process pool when enabled"""
+    needs_media = any(
+        (include_images and _wants_image(s)) or (include_diagrams and _wants_diagram(s)) for s in slides
+    )
+    args = (filepath, slides, style_name, include_images, include_notes, image_mode, include_diagrams)
+    if PPTX_PROCESS_WORKERS > 0 and not needs_media:
+        _get_pptx_process_pool().submit(write_presentation, *args).result()
+        return
+    
+    write_presentation(*args)
+
+@dataclass(frozen=True, slots=True)
+class TextSpec:
+    """Box geometry (inches) and paragraph formatting for one slide textbox"""
+    left: float
+    top: float
+    width: float
+    height: float
+    size: int
+    bold: bool = False
+    italic: bool = False
+    center: bool = False
+    word_wrap: bool = False
+    space_after: Optional[int] = None
+
+def add_text_block(slide, spec: TextSpec, lines: List[str], color: 'RGBColor'):
+    """Add a textbox holding one paragraph per line, each formatted from spec"""
+    from pptx.util import Inches, Pt
+    from pptx.enum.text import PP_ALIGN
+    
+    box = slide.shapes.add_textbox(Inches(spec.left), Inches(spec.top), Inches(spec.width), Inches(spec.height))
+    tf = box.text_frame
+    if spec.word_wrap:
+        tf.word_wrap = True
+    
+    size = Pt(spec.size)
+    space_after = Pt(spec.space_after) if spec.space_after is not None else None
+    for i, line in enumerate(lines):
+        p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+        p.text = line
+        font = p.font
+        font.size = size
+        if spec.bold:
+            font.bold = True
+        if spec.italic:
+            font.italic = True
+        font.color.rgb = color
+        if space_after is not None:
+            p.space_after = space_after
+        if spec.center:
+            p.alignment = PP_ALIGN.CENTER
+    return box
+
+# Textbox layouts for each slide type
+_TITLE_SLIDE_TITLE = TextSpec(0.5, 2.5, 12.333, 1.5, 54, bold=True, center=True, word_wrap=True)
+_TITLE_SLIDE_SUBTITLE = TextSpec(0.5, 4.2, 12.333, 1, 28, center=True)
+_CLOSING_TITLE = TextSpec(0.5, 2, 12.333, 1.5, 60, bold=True, center=True, word_wrap=True)
+_CLOSING_SUBTITLE = TextSpec(0.5, 3.7, 12.333, 0.8, 24, center=True)
+_CLOSING_POINTS = TextSpec(2, 5, 9.333, 1.5, 18, center=True, word_wrap=True, space_after=8)
+_AGENDA_TITLE = TextSpec(0.5, 0.5, 12.333, 1, 40, bold=True)
+_AGENDA_POINTS = TextSpec(1, 1.8, 11, 5, 24, word_wrap=True, space_after=18)
+_CONTENT_TITLE = TextSpec(0.5, 0.5, 12.333, 1, 36, bold=True)
+_CONTENT_POINTS = TextSpec(0.5, 1.8, 12.333, 5, 20, word_wrap=True, space_after=12)
+_TOPIC_TITLE = TextSpec(0.7, 0.45, 11.9, 0.8, 34, bold=True)
+_TOPIC_OVERVIEW = TextSpec(0.7, 1.85, 6.1, 1.05, 16, word_wrap=True)
+_TOPIC_POINTS = TextSpec(0.7, 2.95, 6.1, 2.55, 18, word_wrap=True, space_after=10)
+_TWO_COLUMN_TITLE = TextSpec(0.5, 0.5, 12.333, 1, 36, bold=True)
+_TWO_COLUMN_LEFT = TextSpec(0.5, 1.8, 5.8, 5, 18, word_wrap=True, space_after=10)
+_TWO_COLUMN_RIGHT = TextSpec(7, 1.8, 5.8, 5, 18, word_wrap=True, space_after=10)
+_QUOTE_TEXT = TextSpec(1, 2, 11.333, 3, 32, italic=True, center=True, word_wrap=True)
+_SUMMARY_TITLE = TextSpec(0.5, 0.5, 12.333, 1, 40, bold=True, center=True)
+_SUMMARY_POINTS = TextSpec(1, 2, 11.333, 4.5, 24, center=True, word_wrap=True, space_after=14)
+
+def create_title_slide(slide, data: Dict, colors: SlideColors):
     """Create title slide"""
-    # Title
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(2.5), Inches(12.333), Inches(1.5))
-    tf = title_box.text_frame
-    tf.word_wrap = True
-    p = tf.paragraphs[0]
-    p.text = data.get('title', 'Presentation')
-    p.font.size = Pt(54)
-    p.font.bold = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
-    p.alignment = PP_ALIGN.CENTER
-    
-    # Subtitle
+    add_text_block(slide, _TITLE_SLIDE_TITLE, [data.get('title', 'Presentation')], colors.primary)
     if data.get('subtitle'):
-        sub_box = slide.shapes.add_textbox(Inches(0.5), Inches(4.2), Inches(12.333), Inches(1))
-        tf = sub_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = data['subtitle']
-        p.font.size = Pt(28)
-        p.font.color.rgb = hex_to_rgb(style['secondary_color'])
-        p.alignment = PP_ALIGN.CENTER
-
-def create_closing_slide(slide, data: Dict, style: Dict):
+        add_text_block(slide, _TITLE_SLIDE_SUBTITLE, [data['subtitle']], colors.secondary)
+
+def create_closing_slide(slide, data: Dict, colors: SlideColors):
     """Create professional closing/thank you slide"""
-    # Title (Thank You)
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(2), Inches(12.333), Inches(1.5))
-    tf = title_box.text_frame
-    tf.word_wrap = True
-    p = tf.paragraphs[0]
-    p.text = data.get('title', 'Thank You')
-    p.font.size = Pt(60)
-    p.font.bold = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
-    p.alignment = PP_ALIGN.CENTER
-    
-    # Subtitle
+    add_text_block(slide, _CLOSING_TITLE, [data.get('title', 'Thank You')], colors.primary)
     if data.get('subtitle'):
-        sub_box = slide.shapes.add_textbox(Inches(0.5), Inches(3.7), Inches(12.333), Inches(0.8))
-        tf = sub_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = data['subtitle']
-        p.font.size = Pt(24)
-        p.font.color.rgb = hex_to_rgb(style['secondary_color'])
-        p.alignment = PP_ALIGN.CENTER
-    
-    # Key takeaways or closing message (if provided)
+        add_text_block(slide, _CLOSING_SUBTITLE, [data['subtitle']], colors.secondary)
+    
+    # Key takeaways or closing message (if provided), max 3 points
     if data.get('bullet_points') and len(data['bullet_points']) > 0:
-        content_box = slide.shapes.add_textbox(Inches(2), Inches(5), Inches(9.333), Inches(1.5))
-        tf = content_box.text_frame
-        tf.word_wrap = True
-        
-        for i, point in enumerate(data['bullet_points'][:3]):  # Max 3 points
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            p.text = point
-            p.font.size = Pt(18)
-            p.font.color.rgb = hex_to_rgb(style['text_color'])
-            p.space_after = Pt(8)
-            p.alignment = PP_ALIGN.CENTER
+        add_text_block(slide, _CLOSING_POINTS, data['bullet_points'][:3], colors.text)
 
-def create_agenda_slide(slide, data: Dict, style: Dict):
+def create_agenda_slide(slide, data: Dict, colors: SlideColors):
     """Create agenda/overview slide"""
-    # Title
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(12.333), Inches(1))
-    tf = title_box.text_frame
-    p = tf.paragraphs[0]
-    p.text = data.get('title', 'Agenda')
-    p.font.size = Pt(40)
-    p.font.bold = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
-    
-    # Bullet points
+    add_text_block(slide, _AGENDA_TITLE, [data.get('title', 'Agenda')], colors.primary)
     if data.get('bullet_points'):
-        content_box = slide.shapes.add_textbox(Inches(1), Inches(1.8), Inches(11), Inches(5))
-        tf = content_box.text_frame
-        tf.word_wrap = True
-        
-        for i, point in enumerate(data['bullet_points']):
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            p.text = f"• {point}"
-            p.font.size = Pt(24)
-            p.font.color.rgb = hex_to_rgb(style['text_color'])
-            p.space_after = Pt(18)
+        add_text_block(slide, _AGENDA_POINTS, [f"• {point}" for point in data['bullet_points']], colors.text)
 
-def create_content_slide(slide, data: Dict, style: Dict, layout: str):
+def create_content_slide(slide, data: Dict, colors: SlideColors, layout: str):
     """Create standard content slide"""
-    # Calculate text area based on layout
+    title_spec, points_spec = _CONTENT_TITLE, _CONTENT_POINTS
+    
+    # Narrow the text column beside a side image
     if layout in ['left_image', 'right_image']:
-        text_left = Inches(7) if layout == 'left_image' else Inches(0.5)
-        text_width = Inches(5.5)
-    else:
-        text_left = Inches(0.5)
-        text_width = Inches(12.333)
-    
-    # Title
-    title_box = slide.shapes.add_textbox(text_left, Inches(0.5), text_width, Inches(1))
-    tf = title_box.text_frame
-    p = tf.paragraphs[0]
-    p.text = data.get('title', '')
-    p.font.size = Pt(36)
-    p.font.bold = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
-    
-    # Content
+        text_left = 7 if layout == 'left_image' else 0.5
+        title_spec = replace(title_spec, left=text_left, width=5.5)
+        points_spec = replace(points_spec, left=text_left, width=5.5)
+    
+    add_text_block(slide, title_spec, [data.get('title', '')], colors.primary)
     if data.get('bullet_points'):
-        content_box = slide.shapes.add_textbox(text_left, Inches(1.8), text_width, Inches(5))
-        tf = content_box.text_frame
-        tf.word_wrap = True
-        
-        for i, point in enumerate(data['bullet_points']):
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            p.text = f"• {point}"
-            p.font.size = Pt(20)
-            p.font.color.rgb = hex_to_rgb(style['text_color'])
-            p.space_after = Pt(12)
+        add_text_block(slide, points_spec, [f"• {point}" for point in data['bullet_points']], colors.text)
 
 
-def create_topic_slide(slide, data: Dict, style: Dict):
+def create_topic_slide(slide, data: Dict, colors: SlideColors):
     """Create a topic slide: title + blocks + overview + bullets + (optional) table.
 
     Images are handled by the main loop via image_prompt and layout.
     Diagrams are handled by the main loop via diagram_type/diagram_data.
     """
+    from pptx.util import Inches, Pt
+    from pptx.dml.color import RGBColor
+    from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
+    from pptx.enum.shapes import MSO_SHAPE
 
-    # Title
-    title_box = slide.shapes.add_textbox(Inches(0.7), Inches(0.45), Inches(11.9), Inches(0.8))
-    tf = title_box.text_frame
-    p = tf.paragraphs[0]
-    p.text = data.get('title', '')
-    p.font.size = Pt(34)
-    p.font.bold = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
+    add_text_block(slide, _TOPIC_TITLE, [data.get('title', '')], colors.primary)
 
     # Blocks (pills)
     blocks = data.get('blocks', []) if isinstance(data.get('blocks'), list) else []
     blocks = [str(b).strip() for b in blocks if str(b).strip()][:3]
     x = Inches(0.7)
     y = Inches(1.25)
+    pill = None
     for b in blocks:
-        w = Inches(2.8)
-        h = Inches(0.45)
-        shape = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, x, y, w, h)
-        shape.fill.solid()
-        shape.fill.fore_color.rgb = hex_to_rgb(style['accent_color'])
-        shape.line.color.rgb = hex_to_rgb(style['accent_color'])
-        tfb = shape.text_frame
-        tfb.clear()
-        para = tfb.paragraphs[0]
-        para.text = b
-        para.font.size = Pt(14)
-        para.font.bold = True
-        para.font.color.rgb = RGBColor(255, 255, 255)
-        para.alignment = PP_ALIGN.CENTER
-        tfb.vertical_anchor = MSO_ANCHOR.MIDDLE
+        if pill is None:
+            w = Inches(2.8)
+            h = Inches(0.45)
+            shape = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, x, y, w, h)
+            shape.fill.solid()
+            shape.fill.fore_color.rgb = colors.accent
+            shape.line.color.rgb = colors.accent
+            tfb = shape.text_frame
+            tfb.clear()
+            para = tfb.paragraphs[0]
+            para.text = b
+            para.font.size = Pt(14)
+            para.font.bold = True
+            para.font.color.rgb = RGBColor(255, 255, 255)
+            para.alignment = PP_ALIGN.CENTER
+            tfb.vertical_anchor = MSO_ANCHOR.MIDDLE
+            pill = shape._element
+        else:
+            # The other pills only differ in position and text, so clone the
+            # first one's XML instead of replaying every fill/line/font setter
+            sp = deepcopy(pill)
+            shape_id = slide.shapes._next_shape_id
+            sp.nvSpPr.cNvPr.id = shape_id
+            sp.nvSpPr.cNvPr.name = f'Rounded Rectangle {shape_id - 1}'
+            sp.spPr.xfrm.off.x = x
+            slide.shapes._spTree.insert_element_before(sp, 'p:extLst')
+            slide.shapes[-1].text_frame.paragraphs[0].text = b
         x = x + Inches(3.0)
 
     # Left content (overview + bullets)
-    left_x = Inches(0.7)
-    left_w = Inches(6.1)
-
     overview = str(data.get('overview', '')).strip()
     if overview:
-        overview_box = slide.shapes.add_textbox(left_x, Inches(1.85), left_w, Inches(1.05))
-        tf = overview_box.text_frame
-        tf.word_wrap = True
-        p = tf.paragraphs[0]
-        p.text = overview
-        p.font.size = Pt(16)
-        p.font.color.rgb = hex_to_rgb(style['text_color'])
+        add_text_block(slide, _TOPIC_OVERVIEW, [overview], colors.text)
 
     bullets = data.get('bullet_points', []) if isinstance(data.get('bullet_points'), list) else []
     bullets = [str(b).strip() for b in bullets if str(b).strip()][:5]
     if bullets:
-        bullets_box = slide.shapes.add_textbox(left_x, Inches(2.95), left_w, Inches(2.55))
-        tf = bullets_box.text_frame
-        tf.word_wrap = True
-        for i, point in enumerate(bullets):
-            para = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
-            para.text = f"• {point}"
-            para.font.size = Pt(18)
-            para.font.color.rgb = hex_to_rgb(style['text_color'])
-            para.space_after = Pt(10)
+        add_text_block(slide, _TOPIC_POINTS, [f"• {point}" for point in bullets], colors.text)
 
     # Optional table
     table = data.get('table') if isinstance(data.get('table'), dict) else None
@@ -1119,11 +1587,13 @@ def create_topic_slide(slide, data: Dict, style: Dict):
         headers = [str(h) for h in headers][:5]
         rows = [r for r in rows if isinstance(r, list)][:6]
         if headers and rows:
-            add_table_to_slide(slide, headers, rows, Inches(0.7), Inches(5.6), Inches(6.1), Inches(1.75), style)
+            add_table_to_slide(slide, headers, rows, Inches(0.7), Inches(5.6), Inches(6.1), Inches(1.75), colors)
 
 
-def add_table_to_slide(slide, headers: List[str], rows: List[List[str]], x, y, w, h, style: Dict):
+def add_table_to_slide(slide, headers: List[str], rows: List[List[str]], x, y, w, h, colors: SlideColors):
     """Add a compact table with basic styling."""
+    from pptx.util import Pt
+    from pptx.dml.color import RGBColor
 
     n_rows = 1 + len(rows)
     n_cols = len(headers)
@@ -1138,7 +1608,7 @@ def add_table_to_slide(slide, headers: List[str], rows: List[List[str]], x, y, w
             p.font.size = Pt(12)
             p.font.color.rgb = RGBColor(255, 255, 255)
         cell.fill.solid()
-        cell.fill.fore_color.rgb = hex_to_rgb(style['primary_color'])
+        cell.fill.fore_color.rgb = colors.primary
 
     for ri, row in enumerate(rows, start=1):
         for ci in range(n_cols):
@@ -1149,124 +1619,96 @@ def add_table_to_slide(slide, headers: List[str], rows: List[List[str]], x, y, w
             cell.text = value
             for p in cell.text_frame.paragraphs:
                 p.font.size = Pt(11)
-                p.font.color.rgb = hex_to_rgb(style['text_color'])
+                p.font.color.rgb = colors.text
             if ri % 2 == 0:
                 cell.fill.solid()
-                cell.fill.fore_color.rgb = hex_to_rgb('F3F4F6')
+                cell.fill.fore_color.rgb = colors.table_stripe
 
-def create_two_column_slide(slide, data: Dict, style: Dict):
+def create_two_column_slide(slide, data: Dict, colors: SlideColors):
     """Create two-column comparison slide"""
-    # Title
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(12.333), Inches(1))
-    tf = title_box.text_frame
-    p = tf.paragraphs[0]
-    p.text = data.get('title', '')
-    p.font.size = Pt(36)
-    p.font.bold = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
-    
-    # Left column
-    left_box = slide.shapes.add_textbox(Inches(0.5), Inches(1.8), Inches(5.8), Inches(5))
-    tf = left_box.text_frame
-    tf.word_wrap = True
+    add_text_block(slide, _TWO_COLUMN_TITLE, [data.get('title', '')], colors.primary)
     
     bullet_points = data.get('bullet_points', [])
     half = len(bullet_points) // 2
-    
-    for i, point in enumerate(bullet_points[:half]):
-        if i == 0:
-            p = tf.paragraphs[0]
-        else:
-            p = tf.add_paragraph()
-        p.text = f"• {point}"
-        p.font.size = Pt(18)
-        p.font.color.rgb = hex_to_rgb(style['text_color'])
-        p.space_after = Pt(10)
-    
-    # Right column
-    right_box = slide.shapes.add_textbox(Inches(7), Inches(1.8), Inches(5.8), Inches(5))
-    tf = right_box.text_frame
-    tf.word_wrap = True
-    
-    for i, point in enumerate(bullet_points[half:]):
-        if i == 0:
-            p = tf.paragraphs[0]
-        else:
-            p = tf.add_paragraph()
-        p.text = f"• {point}"
-        p.font.size = Pt(18)
-        p.font.color.rgb = hex_to_rgb(style['text_color'])
-        p.space_after = Pt(10)
+    add_text_block(slide, _TWO_COLUMN_LEFT, [f"• {point}" for point in bullet_points[:half]], colors.text)
+    add_text_block(slide, _TWO_COLUMN_RIGHT, [f"• {point}" for point in bullet_points[half:]], colors.text)
 
-def create_quote_slide(slide, data: Dict, style: Dict):
+def create_quote_slide(slide, data: Dict, colors: SlideColors):
     """Create quote/highlight slide"""
-    # Large quote
-    quote_box = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(11.333), Inches(3))
-    tf = quote_box.text_frame
-    tf.word_wrap = True
-    p = tf.paragraphs[0]
-    
     bullet_points = data.get('bullet_points', [''])
-    p.text = f'"{bullet_points[0]}"'
-    p.font.size = Pt(32)
-    p.font.italic = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
-    p.alignment = PP_ALIGN.CENTER
+    add_text_block(slide, _QUOTE_TEXT, [f'"{bullet_points[0]}"'], colors.primary)
 
-def create_summary_slide(slide, data: Dict, style: Dict):
+def create_summary_slide(slide, data: Dict, colors: SlideColors):
     """Create summary/conclusion slide"""
-    # Title
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(12.333), Inches(1))
-    tf = title_box.text_frame
-    p = tf.paragraphs[0]
-    p.text = data.get('title', 'Key Takeaways')
-    p.font.size = Pt(40)
-    p.font.bold = True
-    p.font.color.rgb = hex_to_rgb(style['primary_color'])
-    p.alignment = PP_ALIGN.CENTER
-    
-    # Summary points
+    add_text_block(slide, _SUMMARY_TITLE, [data.get('title', 'Key Takeaways')], colors.primary)
     if data.get('bullet_points'):
-        content_box = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(11.333), Inches(4.5))
-        tf = content_box.text_frame
-        tf.word_wrap = True
+        add_text_block(slide, _SUMMARY_POINTS, [f"✓ {point}" for point in data['bullet_points']], colors.accent)
+
+# Picture boxes per layout, in inches: (left, top, width, height)
+_IMAGE_BOXES = {
+    'full_image': (0, 0, 13.333, 7.5),
+    'left_image': (0.5, 1.5, 6, 5.5),
+    'right_image': (6.833, 1.5, 6, 5.5),
+    'top_image': (2, 1.5, 9.333, 3),
+}
+
+# Generated images arrive at 1024-1792px as multi-megabyte PNGs; re-encoding them
+# for the box they fill keeps decks small. RECOMPRESS_IMAGES=0 embeds originals.
+RECOMPRESS_IMAGES = os.environ.get('RECOMPRESS_IMAGES', '1') != '0'
+IMAGE_DPI = int(os.environ.get('IMAGE_DPI', '150'))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '88'))
+
+def fit_image_to_box(image_bytes: bytes, width_in: float, height_in: float) -> bytes:
+    """Downscale an image to its on-slide box and re-encode it, keeping the original if that is smaller"""
+    from PIL import Image
+    
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        # PowerPoint stretches the picture to the box, so keep IMAGE_DPI on both axes
+        scale = max(width_in * IMAGE_DPI / img.width, height_in * IMAGE_DPI / img.height)
+        if scale < 1:
+            img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.Resampling.LANCZOS)
+        
+        out = io.BytesIO()
+        # WebP isn't an image type python-pptx can embed; JPEG covers opaque
+        # images and PNG keeps transparency
+        if 'A' in img.getbands() or 'transparency' in img.info:
+            img.save(out, 'PNG', optimize=True)
+        else:
+            img.convert('RGB').save(out, 'JPEG', quality=IMAGE_JPEG_QUALITY, optimize=True)
         
-        for i, point in enumerate(data['bullet_points']):
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            p.text = f"✓ {point}"
-            p.font.size = Pt(24)
-            p.font.color.rgb = hex_to_rgb(style['accent_color'])
-            p.space_after = Pt(14)
-            p.alignment = PP_ALIGN.CENTER
+        recompressed = out.getvalue()
+        return recompressed if len(recompressed) < len(image_bytes) else image_bytes
+    except Exception as e:
+        log.warning('[PPTX] Could not recompress image, embedding original: %s', e)
+        return image_bytes
 
-def add_image_to_slide(slide, image_base64: str, layout: str):
+def add_image_to_slide(slide, image_bytes: bytes, layout: str):
     """Add image to slide based on layout"""
+    from pptx.util import Inches
+    
+    box = _IMAGE_BOXES.get(layout)
+    if box is None:
+        return
+    left, top, width, height = box
+    
     try:
-        image_bytes = base64.b64decode(image_base64)
+        if RECOMPRESS_IMAGES:
+            image_bytes = fit_image_to_box(image_bytes, width, height)
         image_stream = io.BytesIO(image_bytes)
-        
-        if layout == 'full_image':
-            slide.shapes.add_picture(image_stream, Inches(0), Inches(0), width=Inches(13.333), height=Inches(7.5))
-        elif layout == 'left_image':
-            slide.shapes.add_picture(image_stream, Inches(0.5), Inches(1.5), width=Inches(6), height=Inches(5.5))
-        elif layout == 'right_image':
-            slide.shapes.add_picture(image_stream, Inches(6.833), Inches(1.5), width=Inches(6), height=Inches(5.5))
-        elif layout == 'top_image':
-            slide.shapes.add_picture(image_stream, Inches(2), Inches(1.5), width=Inches(9.333), height=Inches(3))
+        slide.shapes.add_picture(image_stream, Inches(left), Inches(top), width=Inches(width), height=Inches(height))
     except Exception as e:
-        print(f'[PPTX] Error adding image: {e}')
+        log.error('[PPTX] Error adding image: %s', e)
 
-def add_diagram_to_slide(slide, diagram_base64: str):
+def add_diagram_to_slide(slide, diagram_bytes: bytes):
     """Add diagram to slide"""
+    from pptx.util import Inches
+    
     try:
-        image_bytes = base64.b64decode(diagram_base64)
-        image_stream = io.BytesIO(image_bytes)
+        image_stream = io.BytesIO(diagram_bytes)
         slide.shapes.add_picture(image_stream, Inches(3), Inches(2.5), width=Inches(7), height=Inches(4))
     except Exception as e:
-        print(f'[PPTX] Error adding diagram: {e}')
+        log.error('[PPTX] Error adding diagram: %s', e)
 
 # =============================================================================
 # CANVA API INTEGRATION
@@ -1292,251 +1734,576 @@ def get_canva_access_token() -> Optional[str]:
     # For OAuth flow, this would handle token refresh
     return CANVA_API_KEY
 
+class _CanvaRetry(Retry):
+    """Retry GETs on 429/5xx, but POSTs only on 429
+
+    Canva POSTs create designs and pages; a 5xx or read timeout may arrive after
+    the write was applied, so replaying one would duplicate it. A 429 means the
+    request was turned away, and connect errors mean it was never sent.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() == 'POST':
+            return status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
+# One keep-alive session for api.canva.com; a deck makes a design, page and
+# export call plus status polls, all to the same host
+CANVA_SESSION = requests.Session()
+CANVA_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    max_retries=_CanvaRetry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+    ),
+))
+CANVA_SESSION.headers['Content-Type'] = 'application/json'
+
+def canva_session() -> Optional[requests.Session]:
+    """Return CANVA_SESSION authorized with the current access token, or None without one"""
+    token = get_canva_access_token()
+    if not token:
+        return None
+    # Only touch the shared headers when the token actually changed
+    auth = f'Bearer {token}'
+    if CANVA_SESSION.headers.get('Authorization') != auth:
+        CANVA_SESSION.headers['Authorization'] = auth
+    return CANVA_SESSION
+
 def create_canva_design(title: str, style_name: str) -> Optional[Dict]:
     """Create a new Canva design from template"""
     
-    token = get_canva_access_token()
-    if not token:
+    session = canva_session()
+    if not session:
         return None
     
     template_id = CANVA_TEMPLATES.get(style_name, CANVA_TEMPLATES['professional'])
     
     try:
         # Create design from template
-        response = requests.post(
+        response = session.post(
             'https://api.canva.com/rest/v1/designs',
-            headers={
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            },
-            json={
+            data=orjson.dumps({
                 'design_type': 'presentation',
                 'title': title,
                 'template_id': template_id
-            },
+            }),
             timeout=30
         )
         
         if response.status_code == 200:
             return response.json()
         else:
-            print(f'[Canva] Create design failed: {response.status_code} - {response.text}')
+            log.error('[Canva] Create design failed: %s - %s', response.status_code, response.text)
             return None
             
     except Exception as e:
-        print(f'[Canva] Error creating design: {e}')
+        log.error('[Canva] Error creating design: %s', e)
         return None
 
 def add_canva_page(design_id: str, slide_data: Dict) -> bool:
     """Add a page to Canva design"""
     
-    token = get_canva_access_token()
-    if not token:
+    session = canva_session()
+    if not session:
         return False
     
     try:
         # Add page with content
-        response = requests.post(
+        response = session.post(
             f'https://api.canva.com/rest/v1/designs/{design_id}/pages',
-            headers={
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            },
-            json={
+            data=orjson.dumps({
                 'title': slide_data.get('title', ''),
                 'elements': build_canva_elements(slide_data)
-            },
+            }),
             timeout=30
         )
         
         return response.status_code == 200
         
     except Exception as e:
-        print(f'[Canva] Error adding page: {e}')
+        log.error('[Canva] Error adding page: %s', e)
         return False
 
+# Element layouts are the same for every slide; only 'content' changes. The nested
+# dicts are shared between calls and only ever serialized, never mutated.
+_CANVA_TITLE_ELEM = {
+    'type': 'TEXT',
+    'style': {
+        'font_family': 'Montserrat',
+        'font_size': 48,
+        'font_weight': 'bold',
+        'text_align': 'center'
+    },
+    'position': {'x': 50, 'y': 50, 'width': 700, 'height': 80}
+}
+_CANVA_SUBTITLE_ELEM = {
+    'type': 'TEXT',
+    'style': {
+        'font_family': 'Open Sans',
+        'font_size': 24,
+        'text_align': 'center'
+    },
+    'position': {'x': 50, 'y': 140, 'width': 700, 'height': 40}
+}
+_CANVA_BULLETS_ELEM = {
+    'type': 'TEXT',
+    'style': {
+        'font_family': 'Open Sans',
+        'font_size': 18,
+        'line_height': 1.5
+    },
+    'position': {'x': 50, 'y': 200, 'width': 700, 'height': 300}
+}
+
 def build_canva_elements(slide_data: Dict) -> List[Dict]:
     """Build Canva elements from slide data"""
     elements = []
     
     # Title element
     if slide_data.get('title'):
-        elements.append({
-            'type': 'TEXT',
-            'content': slide_data['title'],
-            'style': {
-                'font_family': 'Montserrat',
-                'font_size': 48,
-                'font_weight': 'bold',
-                'text_align': 'center'
-            },
-            'position': {'x': 50, 'y': 50, 'width': 700, 'height': 80}
-        })
+        elements.append({**_CANVA_TITLE_ELEM, 'content': slide_data['title']})
     
     # Subtitle element
     if slide_data.get('subtitle'):
-        elements.append({
-            'type': 'TEXT',
-            'content': slide_data['subtitle'],
-            'style': {
-                'font_family': 'Open Sans',
-                'font_size': 24,
-                'text_align': 'center'
-            },
-            'position': {'x': 50, 'y': 140, 'width': 700, 'height': 40}
-        })
+        elements.append({**_CANVA_SUBTITLE_ELEM, 'content': slide_data['subtitle']})
     
     # Bullet points
     if slide_data.get('bullet_points'):
         bullet_text = '\n'.join([f'• {point}' for point in slide_data['bullet_points']])
-        elements.append({
-            'type': 'TEXT',
-            'content': bullet_text,
-            'style': {
-                'font_family': 'Open Sans',
-                'font_size': 18,
-                'line_height': 1.5
-            },
-            'position': {'x': 50, 'y': 200, 'width': 700, 'height': 300}
-        })
+        elements.append({**_CANVA_BULLETS_ELEM, 'content': bullet_text})
     
     return elements
 
+CANVA_EXPORT_TIMEOUT = float(os.environ.get('CANVA_EXPORT_TIMEOUT', '60'))
+CANVA_POLL_INITIAL = 0.05
+CANVA_POLL_FACTOR = 1.3
+CANVA_POLL_MAX = 5.0
+CANVA_POLL_ERROR_MAX = 60.0
+
 def export_canva_design(design_id: str, format: str = 'pptx') -> Optional[str]:
     """Export Canva design to file"""
     
-    token = get_canva_access_token()
-    if not token:
+    session = canva_session()
+    if not session:
         return None
     
     try:
         # Start export job
-        response = requests.post(
+        response = session.post(
             f'https://api.canva.com/rest/v1/designs/{design_id}/exports',
-            headers={
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            },
-            json={
+            data=orjson.dumps({
                 'format': format.upper(),
                 'quality': 'professional'
-            },
+            }),
             timeout=30
         )
         
         if response.status_code != 200:
-            print(f'[Canva] Export failed: {response.status_code}')
+            log.error('[Canva] Export failed: %s', response.status_code)
             return None
         
         export_data = response.json()
         export_id = export_data.get('id')
         
-        # Poll for export completion
-        for _ in range(30):  # Max 30 seconds
-            time.sleep(1)
-            status_response = requests.get(
-                f'https://api.canva.com/rest/v1/exports/{export_id}',
-                headers={'Authorization': f'Bearer {token}'},
-                timeout=30
-            )
+        # Poll for export completion on a gentle exponential schedule (0.05s,
+        # 0.065s, ...): quick exports are seen almost immediately, slow ones
+        # cost a handful of status calls instead of one per second
+        delay = CANVA_POLL_INITIAL
+        deadline = time.monotonic() + CANVA_EXPORT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            try:
+                status_response = session.get(
+                    f'https://api.canva.com/rest/v1/exports/{export_id}',
+                    timeout=30
+                )
+            except requests.RequestException as e:
+                log.warning('[Canva] Export status check failed: %s', e)
+                status_response = None
+            
+            if status_response is None or status_response.status_code != 200:
+                # Back off harder while the status endpoint itself is failing
+                delay = min(delay * 2, CANVA_POLL_ERROR_MAX)
+                continue
             
-            if status_response.status_code == 200:
-                status_data = status_response.json()
-                if status_data.get('status') == 'completed':
-                    return status_data.get('urls', [{}])[0].get('url')
-                elif status_data.get('status') == 'failed':
-                    print(f'[Canva] Export failed: {status_data}')
-                    return None
+            status_data = status_response.json()
+            if status_data.get('status') == 'completed':
+                return status_data.get('urls', [{}])[0].get('url')
+            elif status_data.get('status') == 'failed':
+                log.error('[Canva] Export failed: %s', status_data)
+                return None
+            delay = min(delay * CANVA_POLL_FACTOR, CANVA_POLL_MAX)
         
         return None
         
     except Exception as e:
-        print(f'[Canva] Error exporting: {e}')
+        log.error('[Canva] Error exporting: %s', e)
         return None
 
+CANVA_MAX_PAGE_FAILURES = int(os.environ.get('CANVA_MAX_PAGE_FAILURES', '3'))
+
+# Cleared the first time the bulk endpoint turns out not to exist, so later decks
+# go straight to per-page uploads
+_canva_bulk_pages = True
+
+def add_canva_pages_bulk(design_id: str, slides: List[Dict]) -> Optional[bool]:
+    """Add all pages in a single request; None means the bulk endpoint isn't available"""
+    global _canva_bulk_pages
+    
+    session = canva_session()
+    if not session or not _canva_bulk_pages:
+        return None
+    
+    try:
+        response = session.post(
+            f'https://api.canva.com/rest/v1/designs/{design_id}/pages:batchCreate',
+            data=orjson.dumps({
+                'pages': [
+                    {'title': slide.get('title', ''), 'elements': build_canva_elements(slide)}
+                    for slide in slides
+                ]
+            }),
+            timeout=60
+        )
+        
+        if response.status_code in (404, 405, 501):
+            # The bulk endpoint doesn't exist here, so stop trying it; per-page
+            # uploads still work
+            log.info('[Canva] Bulk page endpoint unavailable (%s), adding pages one by one', response.status_code)
+            _canva_bulk_pages = False
+            return None
+        if 400 <= response.status_code < 500:
+            # Rejected without being applied (rate limit, this deck's payload,
+            # token scope); try per-page for this deck only
+            log.warning('[Canva] Bulk page add rejected (%s), adding pages one by one', response.status_code)
+            return None
+        if response.status_code != 200:
+            log.error('[Canva] Bulk page add failed: %s', response.status_code)
+            return False
+        return True
+        
+    except Exception as e:
+        # A timeout may land after Canva applied the batch; uploading the pages
+        # again could duplicate every slide, so give up on Canva for this deck
+        log.error('[Canva] Error adding pages: %s', e)
+        return False
+
+def add_canva_pages(design_id: str, slides: List[Dict]) -> bool:
+    """Add pages one request per slide, in slide order"""
+    # Canva appends each page as its request lands, so the uploads go one at a
+    # time; sending them side by side would shuffle the deck
+    failures = 0
+    for i, slide in enumerate(slides):
+        if add_canva_page(design_id, slide):
+            continue
+        failures += 1
+        log.error('[Canva] Failed to add slide %s', i + 1)
+        if failures >= CANVA_MAX_PAGE_FAILURES:
+            # The API is clearly struggling; stop and let the caller build a PPTX
+            log.error('[Canva] %s slides failed', failures)
+            return False
+    return True
+
+# After CANVA_BREAKER_FAILURES failed decks in a row, each within
+# CANVA_BREAKER_WINDOW seconds of the last, Canva is skipped for
+# CANVA_BREAKER_COOLDOWN seconds; the first deck that succeeds closes it again
+CANVA_BREAKER_FAILURES = int(os.environ.get('CANVA_BREAKER_FAILURES', '3'))
+CANVA_BREAKER_WINDOW = float(os.environ.get('CANVA_BREAKER_WINDOW', '300'))
+CANVA_BREAKER_COOLDOWN = float(os.environ.get('CANVA_BREAKER_COOLDOWN', '60'))
+_canva_breaker_lock = threading.Lock()
+_canva_failures = 0
+_canva_last_failure = 0.0
+_canva_circuit_open_until = 0.0
+
+def _canva_circuit_open() -> bool:
+    """True while recent Canva failures say not to bother trying"""
+    return time.monotonic() < _canva_circuit_open_until
+
+def _record_canva_result(ok: bool):
+    """Feed one deck's outcome into the circuit breaker"""
+    global _canva_failures, _canva_last_failure, _canva_circuit_open_until
+    with _canva_breaker_lock:
+        if ok:
+            _canva_failures = 0
+            _canva_circuit_open_until = 0.0
+            return
+        now = time.monotonic()
+        if now - _canva_last_failure > CANVA_BREAKER_WINDOW:
+            _canva_failures = 0
+        _canva_failures += 1
+        _canva_last_failure = now
+        if _canva_failures >= CANVA_BREAKER_FAILURES:
+            _canva_circuit_open_until = now + CANVA_BREAKER_COOLDOWN
+            _canva_failures = 0
+            log.warning('[Canva] Circuit open for %.0fs after repeated failures', CANVA_BREAKER_COOLDOWN)
+
 def create_with_canva(slides: List[Dict], style_name: str, title: str = 'AI Presentation') -> Optional[str]:
     """Create presentation using Canva API (if available)"""
     
-    if not CANVA_API_KEY:
-        print('[Canva] No API key configured, skipping Canva integration')
+    if not CANVA_ENABLED or _canva_circuit_open():
         return None
     
+    download_url = build_canva_presentation(slides, style_name, title)
+    _record_canva_result(download_url is not None)
+    return download_url
+
+def build_canva_presentation(slides: List[Dict], style_name: str, title: str) -> Optional[str]:
+    """Run the design, pages and export steps; None on any failure"""
+    
     try:
-        print(f'[Canva] Creating presentation with {len(slides)} slides, style: {style_name}')
+        log.info('[Canva] Creating presentation with %s slides, style: %s', len(slides), style_name)
         
         # Step 1: Create design from template
         design = create_canva_design(title, style_name)
         if not design:
-            print('[Canva] Failed to create design, falling back to PPTX')
+            log.error('[Canva] Failed to create design, falling back to PPTX')
             return None
         
         design_id = design.get('design', {}).get('id')
         if not design_id:
-            print('[Canva] No design ID returned')
+            log.info('[Canva] No design ID returned')
             return None
         
-        print(f'[Canva] Created design: {design_id}')
+        log.info('[Canva] Created design: %s', design_id)
         
-        # Step 2: Add pages for each slide
-        for i, slide in enumerate(slides):
-            print(f'[Canva] Adding slide {i+1}/{len(slides)}')
-            if not add_canva_page(design_id, slide):
-                print(f'[Canva] Failed to add slide {i+1}')
+        # Step 2: Add pages, in one bulk request when the API accepts it
+        log.info('[Canva] Adding %s slides', len(slides))
+        added = add_canva_pages_bulk(design_id, slides)
+        if added is None:
+            added = add_canva_pages(design_id, slides)
+        if not added:
+            log.error('[Canva] Failed to add slides, falling back to PPTX')
+            return None
         
         # Step 3: Export to PPTX
-        print('[Canva] Exporting design to PPTX...')
+        log.info('[Canva] Exporting design to PPTX...')
         download_url = export_canva_design(design_id, 'pptx')
         
         if download_url:
-            print(f'[Canva] Export successful: {download_url}')
+            log.info('[Canva] Export successful: %s', download_url)
             return download_url
         else:
-            print('[Canva] Export failed, falling back to PPTX')
+            log.error('[Canva] Export failed, falling back to PPTX')
             return None
             
     except Exception as e:
-        print(f'[Canva] Error: {e}')
+        log.error('[Canva] Error: %s', e)
         return None
 
+# =============================================================================
+# GENERATED FILES
+# =============================================================================
+
+# Decks wait in the temp dir until /download serves them; the directory is shared
+# by all gunicorn workers, so either one can answer the download. On Cloud Run it
+# is an in-memory filesystem, so files older than RESULT_TTL are swept out while
+# new ones are written, at most once a minute.
+RESULT_TTL = int(os.environ.get('RESULT_TTL', '900'))
+RESULT_DIR = tempfile.gettempdir()
+_last_result_sweep = 0.0
+
+def result_path(request_id: str, ext: str) -> Tuple[str, str]:
+    """Return (filename, filepath) for a request's generated file"""
+    filename = f'presentation_{request_id}.{ext}'
+    return filename, os.path.join(RESULT_DIR, filename)
+
+RESULT_CACHE_CONTROL = 'private, max-age=300'
+
+def send_result(filepath: str, mimetype: str, filename: str) -> Response:
+    """Send a generated file so repeat downloads can be answered with a 304"""
+    # Werkzeug derives the ETag from the file's mtime and size, which every
+    # worker sees the same way since the files live in the shared RESULT_DIR
+    response = send_file(
+        filepath,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=filename,
+        conditional=True,
+        etag=True,
+        last_modified=os.path.getmtime(filepath)
+    )
+    response.headers['Cache-Control'] = RESULT_CACHE_CONTROL
+    return response
+
+def sweep_expired_results():
+    """Delete generated files older than RESULT_TTL"""
+    global _last_result_sweep
+    now = time.time()
+    if RESULT_TTL <= 0 or now - _last_result_sweep < 60:
+        return
+    _last_result_sweep = now
+    
+    cutoff = now - RESULT_TTL
+    try:
+        with os.scandir(RESULT_DIR) as entries:
+            for entry in entries:
+                if entry.name.startswith('presentation_') and entry.name.endswith(('.pptx', '.pdf')):
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                    except OSError:
+                        pass  # Already removed by another worker
+    except OSError as e:
+        log.warning('[Files] Could not sweep expired results: %s', e)
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+# A full generation can take 30s+. Called with ?async=1, the generate endpoints
+# hand the work to this pool and answer 202 straight away; clients then poll
+# /status/<job_id>, whose result is exactly what the synchronous call returns.
+# Job state lives in the shared disk cache, so any gunicorn worker can answer.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+_job_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+
+def _job_key(job_id: str) -> str:
+    return f'job:{job_id}'
+
+def async_job(view):
+    """Let a generate endpoint run in the background when called with ?async=1
+
+    The body is read and validated here, while the request is live, and the view
+    receives the result as its params argument. An invalid body gets its 400 right
+    away, even for async callers; a queued job may only start after the 202 has
+    gone out, when the request stream is no longer readable.
+    """
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            kwargs['params'] = _parse_generate_params(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e), 'request_id': str(uuid.uuid4())[:8]}), 400
+        if request.args.get('async', '').lower() not in ('1', 'true'):
+            return view(*args, **kwargs)
+        
+        job_id = str(uuid.uuid4())
+        CACHE.set(_job_key(job_id), {'status': 'pending'}, expire=RESULT_TTL)
+        
+        @copy_current_request_context
+        def run_view() -> Response:
+            return app.make_response(view(*args, **kwargs))
+        
+        def run_job():
+            try:
+                response = run_view()
+                state = {
+                    'status': 'done' if response.status_code < 400 else 'error',
+                    'http_status': response.status_code,
+                    'result': response.get_json(),
+                }
+            except Exception as e:
+                log.error('[Job %s] Error: %s', job_id, e)
+                state = {'status': 'error', 'http_status': 500, 'result': {'error': str(e)}}
+            CACHE.set(_job_key(job_id), state, expire=RESULT_TTL)
+        
+        _job_pool.submit(run_job)
+        return jsonify({'job_id': job_id, 'status': 'pending', 'status_url': f'/status/{job_id}'}), 202
+    
+    return wrapper
+
+@app.route('/status/<job_id>', methods=['GET'])
+def job_status(job_id: str):
+    """Report a background generation job as pending, done or error"""
+    state = CACHE.get(_job_key(job_id))
+    if state is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify({'job_id': job_id, **state})
+
+# =============================================================================
+# REQUEST PARAMETERS
+# =============================================================================
+
+MIN_CONTENT_LENGTH = 100
+MAX_SLIDE_COUNT = int(os.environ.get('MAX_SLIDE_COUNT', '100'))
+
+@dataclass(frozen=True, slots=True)
+class GenerateParams:
+    """Validated body of a generate or preview request"""
+    content: str
+    style: str
+    slide_count: int
+    title: str
+    include_images: bool
+    include_diagrams: bool
+    image_mode: str
+    structure_mode: str
+    
+    @property
+    def topics_mode(self) -> bool:
+        return self.structure_mode in ('topics', 'topic')
+
+def _parse_generate_params(data: Any) -> GenerateParams:
+    """Check a request body before any LLM work; a ValueError's message is the 400 error"""
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    
+    content = data.get('content') or ''
+    if not isinstance(content, str) or len(content) < MIN_CONTENT_LENGTH:
+        raise ValueError('Content too short')
+    
+    slide_count = data.get('slide_count', data.get('slideCount', 10))  # Support both naming conventions
+    try:
+        slide_count = int(slide_count)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid slide_count: {slide_count!r}') from None
+    if not 1 <= slide_count <= MAX_SLIDE_COUNT:
+        raise ValueError(f'slide_count must be between 1 and {MAX_SLIDE_COUNT}')
+    
+    style = data.get('style') or 'professional'
+    if not isinstance(style, str) or style not in PRESENTATION_STYLES:
+        raise ValueError(f'Unknown style: {style!r}')
+    
+    structure_mode = data.get('structure', data.get('structureMode', 'classic'))
+    
+    return GenerateParams(
+        content=content,
+        style=style,
+        slide_count=slide_count,
+        title=data.get('title', 'AI Generated Presentation'),
+        include_images=bool(data.get('include_images', data.get('includeImages', True))),
+        include_diagrams=bool(data.get('include_diagrams', data.get('includeDiagrams', True))),
+        image_mode=data.get('image_mode', data.get('imageMode', 'default')),
+        structure_mode=str(structure_mode or 'classic').strip().lower(),
+    )
+
 # =============================================================================
 # MAIN ENDPOINTS
 # =============================================================================
 
 @app.route('/generate', methods=['POST'])
-def generate_presentation():
+@async_job
+def generate_presentation(params: GenerateParams):
     """Generate complete presentation from document content"""
     
     start_time = time.time()
     request_id = str(uuid.uuid4())[:8]
     
     try:
-        data = request.json
-        content = data.get('content', '')
-        style = data.get('style', 'professional')
-        slide_count = data.get('slide_count', data.get('slideCount', 10))  # Support both naming conventions
-        include_images = data.get('include_images', data.get('includeImages', True))
-        image_mode = data.get('image_mode', data.get('imageMode', 'default'))
-        title = data.get('title', 'AI Generated Presentation')
-
-        structure_mode = data.get('structure', data.get('structureMode', 'classic'))
-        structure_mode = (structure_mode or 'classic').strip().lower()
-        topics_mode = structure_mode in ('topics', 'topic')
+        content = params.content
+        style = params.style
+        slide_count_int = params.slide_count
+        include_images = params.include_images
+        include_diagrams = params.include_diagrams
+        image_mode = params.image_mode
+        title = params.title
+
+        structure_mode = params.structure_mode
+        topics_mode = params.topics_mode
         include_notes = not topics_mode
         
-        print(f'[{request_id}] Request params: slide_count={slide_count}, style={style}, include_images={include_images}, image_mode={image_mode}, structure={structure_mode}, content_length={len(content)}')
-        
-        if not content or len(content) < 100:
-            return jsonify({'error': 'Content too short'}), 400
+        log.info('[%s] Request params: slide_count=%s, style=%s, include_images=%s, image_mode=%s, structure=%s, content_length=%s', request_id, slide_count_int, style, include_images, image_mode, structure_mode, len(content))
         
-        print(f'[{request_id}] Generating presentation: {slide_count} slides, style: {style}, structure: {structure_mode}')
+        log.info('[%s] Generating presentation: %s slides, style: %s, structure: %s', request_id, slide_count_int, style, structure_mode)
         
         # Step 1: Generate slide structure with GPT-4o
-        print(f'[{request_id}] Step 1: Generating slide structure...')
-        try:
-            slide_count_int = int(slide_count)
-        except Exception:
-            slide_count_int = 10
-
+        log.info('[%s] Step 1: Generating slide structure...', request_id)
         if topics_mode:
             slides = generate_topic_slide_structure(content, slide_count_int, style)
             for s in slides:
@@ -1549,10 +2316,10 @@ def generate_presentation():
                 slides[0]['title'] = title
         
         # Step 2: Try Canva first, fall back to python-pptx
-        print(f'[{request_id}] Step 2: Creating presentation...')
+        log.info('[%s] Step 2: Creating presentation...', request_id)
         canva_url = None
         if not topics_mode:
-            canva_url = create_with_canva(slides, style, title)
+            canva_url = create_with_canva(slides, style, title) if CANVA_ENABLED and not _canva_circuit_open() else None
         
         if canva_url:
             return jsonify({
@@ -1566,17 +2333,15 @@ def generate_presentation():
             })
         
         # Generate with python-pptx
-        print(f'[{request_id}] Step 3: Building PPTX with images...')
-        pptx_bytes = create_presentation(slides, style, include_images, include_notes=include_notes, image_mode=image_mode)
+        log.info('[%s] Step 3: Building PPTX with images...', request_id)
         
-        # Save to temp file
-        filename = f'presentation_{request_id}.pptx'
-        filepath = os.path.join(tempfile.gettempdir(), filename)
-        with open(filepath, 'wb') as f:
-            f.write(pptx_bytes)
+        # Save straight to the temp file served by /download
+        sweep_expired_results()
+        filename, filepath = result_path(request_id, 'pptx')
+        save_presentation(filepath, slides, style, include_images, include_notes=include_notes, image_mode=image_mode, include_diagrams=include_diagrams)
         
         duration = round(time.time() - start_time, 2)
-        print(f'[{request_id}] Presentation created in {duration}s')
+        log.info('[%s] Presentation created in %ss', request_id, duration)
         
         return jsonify({
             'success': True,
@@ -1593,65 +2358,54 @@ def generate_presentation():
         })
         
     except Exception as e:
-        print(f'[{request_id}] Error: {e}')
+        log.error('[%s] Error: %s', request_id, e)
         return jsonify({'error': str(e), 'request_id': request_id}), 500
 
 @app.route('/generate-enhanced', methods=['POST'])
-def generate_enhanced_presentation():
+@async_job
+def generate_enhanced_presentation(params: GenerateParams):
     """Generate enhanced presentation with web search enrichment"""
     
     start_time = time.time()
     request_id = str(uuid.uuid4())[:8]
     
     try:
-        data = request.json
-        content = data.get('content', '')
-        style = data.get('style', 'professional')
-        slide_count = data.get('slide_count', data.get('slideCount', 10))
-        include_images = data.get('include_images', data.get('includeImages', True))
-        image_mode = data.get('image_mode', data.get('imageMode', 'default'))
-        title = data.get('title', 'AI Generated Presentation')
-
-        structure_mode = data.get('structure', data.get('structureMode', 'classic'))
-        structure_mode = (structure_mode or 'classic').strip().lower()
-        topics_mode = structure_mode in ('topics', 'topic')
+        content = params.content
+        style = params.style
+        slide_count_int = params.slide_count
+        include_images = params.include_images
+        include_diagrams = params.include_diagrams
+        image_mode = params.image_mode
+        title = params.title
+
+        structure_mode = params.structure_mode
+        topics_mode = params.topics_mode
         include_notes = not topics_mode
-
-        try:
-            slide_count_int = int(slide_count)
-        except Exception:
-            slide_count_int = 10
         
-        print(f'[{request_id}] ENHANCED Request: slide_count={slide_count}, style={style}, structure={structure_mode}, content_length={len(content)}')
-        
-        if not content or len(content) < 100:
-            return jsonify({'error': 'Content too short'}), 400
+        log.info('[%s] ENHANCED Request: slide_count=%s, style=%s, structure=%s, content_length=%s', request_id, slide_count_int, style, structure_mode, len(content))
         
         all_web_results = []
         search_queries = []
 
         if topics_mode:
-            print(f'[{request_id}] Topics mode: skipping web enrichment; using topic structure')
+            log.info('[%s] Topics mode: skipping web enrichment; using topic structure', request_id)
             slides = generate_topic_slide_structure(content, slide_count_int, style)
             for s in slides:
                 if isinstance(s, dict):
                     s.pop('speaker_notes', None)
         else:
             # Step 1: Extract search queries from content
-            print(f'[{request_id}] Step 1: Extracting search queries...')
+            log.info('[%s] Step 1: Extracting search queries...', request_id)
             search_queries = extract_search_queries_from_content(content, slide_count_int)
 
             # Step 2: Perform web searches
-            print(f'[{request_id}] Step 2: Searching web for enrichment data...')
-            for query in search_queries[:5]:  # Limit to 5 queries
-                results = search_web_for_topic(query, max_results=3)
-                all_web_results.extend(results)
-                time.sleep(0.5)  # Rate limiting
+            log.info('[%s] Step 2: Searching web for enrichment data...', request_id)
+            all_web_results = search_web_for_queries(search_queries[:5], max_results=3)  # Limit to 5 queries
 
-            print(f'[{request_id}] Collected {len(all_web_results)} web results')
+            log.info('[%s] Collected %s web results', request_id, len(all_web_results))
 
             # Step 3: Generate enhanced slide structure with web data
-            print(f'[{request_id}] Step 3: Generating enhanced slide structure...')
+            log.info('[%s] Step 3: Generating enhanced slide structure...', request_id)
             slides = generate_enhanced_slide_structure(content, slide_count_int, style, all_web_results)
 
             # Ensure professional opening and closing
@@ -1671,10 +2425,10 @@ def generate_enhanced_presentation():
                 })
         
         # Step 4: Try Canva first, fall back to python-pptx
-        print(f'[{request_id}] Step 4: Creating presentation...')
+        log.info('[%s] Step 4: Creating presentation...', request_id)
         canva_url = None
         if not topics_mode:
-            canva_url = create_with_canva(slides, style, title)
+            canva_url = create_with_canva(slides, style, title) if CANVA_ENABLED and not _canva_circuit_open() else None
         
         if canva_url:
             return jsonify({
@@ -1690,17 +2444,15 @@ def generate_enhanced_presentation():
             })
         
         # Generate with python-pptx
-        print(f'[{request_id}] Step 5: Building PPTX with images...')
-        pptx_bytes = create_presentation(slides, style, include_images, include_notes=include_notes, image_mode=image_mode)
+        log.info('[%s] Step 5: Building PPTX with images...', request_id)
         
-        # Save to temp file
-        filename = f'presentation_{request_id}.pptx'
-        filepath = os.path.join(tempfile.gettempdir(), filename)
-        with open(filepath, 'wb') as f:
-            f.write(pptx_bytes)
+        # Save straight to the temp file served by /download
+        sweep_expired_results()
+        filename, filepath = result_path(request_id, 'pptx')
+        save_presentation(filepath, slides, style, include_images, include_notes=include_notes, image_mode=image_mode, include_diagrams=include_diagrams)
         
         duration = round(time.time() - start_time, 2)
-        print(f'[{request_id}] Enhanced presentation created in {duration}s')
+        log.info('[%s] Enhanced presentation created in %ss', request_id, duration)
         
         return jsonify({
             'success': True,
@@ -1720,7 +2472,7 @@ def generate_enhanced_presentation():
         })
         
     except Exception as e:
-        print(f'[{request_id}] Enhanced Error: {e}')
+        log.error('[%s] Enhanced Error: %s', request_id, e)
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e), 'request_id': request_id}), 500
@@ -1729,17 +2481,15 @@ def generate_enhanced_presentation():
 def download_presentation(request_id: str):
     """Download generated presentation"""
     
-    filename = f'presentation_{request_id}.pptx'
-    filepath = os.path.join(tempfile.gettempdir(), filename)
+    filename, filepath = result_path(request_id, 'pptx')
     
     if not os.path.exists(filepath):
         return jsonify({'error': 'Presentation not found or expired'}), 404
     
-    return send_file(
+    return send_result(
         filepath,
-        mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
-        as_attachment=True,
-        download_name=filename
+        'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        filename
     )
 
 @app.route('/preview', methods=['POST'])
@@ -1747,25 +2497,20 @@ def preview_slides():
     """Generate slide structure preview without images (faster)"""
     
     try:
-        data = request.json
-        content = data.get('content', '')
-        style = data.get('style', 'professional')
-        slide_count = data.get('slide_count', data.get('slideCount', 10))  # Support both naming conventions
+        params = _parse_generate_params(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        content = params.content
+        style = params.style
+        slide_count_int = params.slide_count
 
-        structure_mode = data.get('structure', data.get('structureMode', 'classic'))
-        structure_mode = (structure_mode or 'classic').strip().lower()
-        topics_mode = structure_mode in ('topics', 'topic')
+        structure_mode = params.structure_mode
+        topics_mode = params.topics_mode
         
-        print(f'[Preview] Request: slide_count={slide_count}, style={style}, structure={structure_mode}, content_length={len(content)}')
+        log.info('[Preview] Request: slide_count=%s, style=%s, structure=%s, content_length=%s', slide_count_int, style, structure_mode, len(content))
         
-        if not content or len(content) < 100:
-            return jsonify({'error': 'Content too short'}), 400
-        
-        try:
-            slide_count_int = int(slide_count)
-        except Exception:
-            slide_count_int = 10
-
         if topics_mode:
             slides = generate_topic_slide_structure(content, slide_count_int, style)
             for s in slides:
@@ -1773,14 +2518,14 @@ def preview_slides():
                     s.pop('speaker_notes', None)
         else:
             slides = generate_slide_structure(content, slide_count_int, style)
-        print(f'[Preview] Generated {len(slides)} slides')
+        log.info('[Preview] Generated %s slides', len(slides))
         
         return jsonify({
             'success': True,
             'slides': slides,
             'style': style,
             'structure': structure_mode,
-            'style_details': PRESENTATION_STYLES.get(style)
+            'style_details': _STYLES_PAYLOAD.get(style)
         })
         
     except Exception as e:
@@ -1790,14 +2535,72 @@ def preview_slides():
 # PDF GENERATION
 # =============================================================================
 
-def create_pdf_presentation(slides: List[Dict], style_name: str = 'professional', include_notes: bool = True) -> bytes:
-    """Create PDF presentation from slide structure"""
+@dataclass(frozen=True, slots=True)
+class PdfStyles:
+    """ReportLab paragraph styles for one presentation style"""
+    title: 'ParagraphStyle'
+    subtitle: 'ParagraphStyle'
+    bullet: 'ParagraphStyle'
+    slide_num: 'ParagraphStyle'
+    notes: 'ParagraphStyle'
+
+@lru_cache(maxsize=16)
+def get_pdf_styles(style: PresentationStyle) -> PdfStyles:
+    """Build a style's paragraph styles once; getSampleStyleSheet() alone builds a dozen"""
+    from reportlab.lib import colors as rl_colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
     
-    style = PRESENTATION_STYLES.get(style_name, PRESENTATION_STYLES['professional'])
+    styles = getSampleStyleSheet()
     
+    return PdfStyles(
+        title=ParagraphStyle(
+            'SlideTitle',
+            parent=styles['Heading1'],
+            fontSize=32,
+            textColor=rl_colors.HexColor('#' + style.primary_color),
+            alignment=TA_CENTER,
+            spaceAfter=20
+        ),
+        subtitle=ParagraphStyle(
+            'SlideSubtitle',
+            parent=styles['Heading2'],
+            fontSize=18,
+            textColor=rl_colors.HexColor('#' + style.secondary_color),
+            alignment=TA_CENTER,
+            spaceAfter=30
+        ),
+        bullet=ParagraphStyle(
+            'SlideBullet',
+            parent=styles['Normal'],
+            fontSize=16,
+            textColor=rl_colors.HexColor('#' + style.text_color),
+            leftIndent=40,
+            spaceBefore=20,
+            spaceAfter=12,
+            bulletIndent=20
+        ),
+        slide_num=ParagraphStyle('SlideNum', fontSize=10, textColor=rl_colors.gray, spaceAfter=20),
+        notes=ParagraphStyle('Notes', fontSize=10, textColor=rl_colors.gray, alignment=TA_LEFT, spaceBefore=40),
+    )
+
+def create_pdf_presentation(slides: List[Dict], style_name: str = 'professional', include_notes: bool = True) -> bytes:
+    """Create PDF presentation from slide structure and return it as bytes"""
     buffer = io.BytesIO()
+    write_pdf_presentation(buffer, slides, style_name, include_notes)
+    return buffer.getvalue()
+
+def write_pdf_presentation(output: Union[str, IO[bytes]], slides: List[Dict], style_name: str = 'professional', include_notes: bool = True):
+    """Create PDF presentation from slide structure and save it to a path or binary stream"""
+    from reportlab.lib.pagesizes import LETTER, landscape
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak
+    from xml.sax.saxutils import escape
+    
+    style = get_style(style_name)
+    
     doc = SimpleDocTemplate(
-        buffer,
+        output,
         pagesize=landscape(LETTER),
         rightMargin=0.5*inch,
         leftMargin=0.5*inch,
@@ -1805,36 +2608,7 @@ def create_pdf_presentation(slides: List[Dict], style_name: str = 'professional'
         bottomMargin=0.5*inch
     )
     
-    # Custom styles
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'SlideTitle',
-        parent=styles['Heading1'],
-        fontSize=32,
-        textColor=rl_colors.HexColor('#' + style['primary_color']),
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'SlideSubtitle',
-        parent=styles['Heading2'],
-        fontSize=18,
-        textColor=rl_colors.HexColor('#' + style['secondary_color']),
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
-    
-    bullet_style = ParagraphStyle(
-        'SlideBullet',
-        parent=styles['Normal'],
-        fontSize=16,
-        textColor=rl_colors.HexColor('#' + style['text_color']),
-        leftIndent=40,
-        spaceAfter=12,
-        bulletIndent=20
-    )
+    styles = get_pdf_styles(style)
     
     elements = []
     
@@ -1843,65 +2617,53 @@ def create_pdf_presentation(slides: List[Dict], style_name: str = 'professional'
         if i > 0:
             elements.append(PageBreak())
         
+        # Gaps between blocks come from the styles' spaceBefore/spaceAfter
+        # rather than Spacer flowables, so layout has fewer flowables to place
+        
         # Slide number
-        slide_num = Paragraph(f"Slide {i+1}", ParagraphStyle('SlideNum', fontSize=10, textColor=rl_colors.gray))
-        elements.append(slide_num)
-        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(f"Slide {i+1}", styles.slide_num))
         
         # Title
-        title = slide.get('title', f'Slide {i+1}')
-        elements.append(Paragraph(title, title_style))
+        title = slide.get('title') or f'Slide {i+1}'
+        elements.append(Paragraph(escape(str(title)), styles.title))
         
         # Subtitle
         if slide.get('subtitle'):
-            elements.append(Paragraph(slide['subtitle'], subtitle_style))
-        
-        elements.append(Spacer(1, 20))
+            elements.append(Paragraph(escape(str(slide['subtitle'])), styles.subtitle))
         
-        # Bullet points
-        bullet_points = slide.get('bullet_points', [])
-        for point in bullet_points:
-            bullet_text = f"• {point}"
-            elements.append(Paragraph(bullet_text, bullet_style))
+        # Bullet points, parsed as one paragraph instead of one per point
+        bullet_points = [point for point in slide.get('bullet_points') or [] if point is not None and point != '']
+        if bullet_points:
+            elements.append(Paragraph(
+                '<br/>'.join(f'• {escape(str(point))}' for point in bullet_points),
+                styles.bullet
+            ))
         
         # Speaker notes (optional)
         if include_notes and slide.get('speaker_notes'):
-            elements.append(Spacer(1, 40))
-            notes_style = ParagraphStyle('Notes', fontSize=10, textColor=rl_colors.gray, alignment=TA_LEFT)
-            elements.append(Paragraph(f"📝 Notes: {slide['speaker_notes']}", notes_style))
+            elements.append(Paragraph(f"📝 Notes: {escape(str(slide['speaker_notes']))}", styles.notes))
     
     doc.build(elements)
-    buffer.seek(0)
-    return buffer.read()
 
 @app.route('/generate-pdf', methods=['POST'])
-def generate_pdf_presentation():
+@async_job
+def generate_pdf_presentation(params: GenerateParams):
     """Generate PDF presentation from document content"""
     
     start_time = time.time()
     request_id = str(uuid.uuid4())[:8]
     
     try:
-        data = request.json
-        content = data.get('content', '')
-        style = data.get('style', 'professional')
-        slide_count = data.get('slide_count', data.get('slideCount', 10))
-        title = data.get('title', 'AI Generated Presentation')
-
-        structure_mode = data.get('structure', data.get('structureMode', 'classic'))
-        structure_mode = (structure_mode or 'classic').strip().lower()
-        topics_mode = structure_mode in ('topics', 'topic')
-        include_notes = not topics_mode
+        content = params.content
+        style = params.style
+        slide_count_int = params.slide_count
+        title = params.title
 
-        try:
-            slide_count_int = int(slide_count)
-        except Exception:
-            slide_count_int = 10
-        
-        print(f'[{request_id}] PDF Request: slide_count={slide_count}, style={style}')
+        structure_mode = params.structure_mode
+        topics_mode = params.topics_mode
+        include_notes = not topics_mode
         
-        if not content or len(content) < 100:
-            return jsonify({'error': 'Content too short'}), 400
+        log.info('[%s] PDF Request: slide_count=%s, style=%s', request_id, slide_count_int, style)
         
         # Generate slide structure
         if topics_mode:
@@ -1916,16 +2678,13 @@ def generate_pdf_presentation():
                 slides[0]['title'] = title
         
         # Generate PDF
-        pdf_bytes = create_pdf_presentation(slides, style, include_notes=include_notes)
-        
-        # Save to temp file
-        filename = f'presentation_{request_id}.pdf'
-        filepath = os.path.join(tempfile.gettempdir(), filename)
-        with open(filepath, 'wb') as f:
-            f.write(pdf_bytes)
+        # Build straight into the temp file served by /download-pdf
+        sweep_expired_results()
+        filename, filepath = result_path(request_id, 'pdf')
+        write_pdf_presentation(filepath, slides, style, include_notes=include_notes)
         
         duration = round(time.time() - start_time, 2)
-        print(f'[{request_id}] PDF created in {duration}s')
+        log.info('[%s] PDF created in %ss', request_id, duration)
         
         return jsonify({
             'success': True,
@@ -1941,61 +2700,49 @@ def generate_pdf_presentation():
         })
         
     except Exception as e:
-        print(f'[{request_id}] PDF Error: {e}')
+        log.error('[%s] PDF Error: %s', request_id, e)
         return jsonify({'error': str(e), 'request_id': request_id}), 500
 
 @app.route('/generate-pdf-enhanced', methods=['POST'])
-def generate_pdf_enhanced_presentation():
+@async_job
+def generate_pdf_enhanced_presentation(params: GenerateParams):
     """Generate enhanced PDF presentation with web search enrichment"""
     
     start_time = time.time()
     request_id = str(uuid.uuid4())[:8]
     
     try:
-        data = request.json
-        content = data.get('content', '')
-        style = data.get('style', 'professional')
-        slide_count = data.get('slide_count', data.get('slideCount', 10))
-        title = data.get('title', 'AI Generated Presentation')
-
-        structure_mode = data.get('structure', data.get('structureMode', 'classic'))
-        structure_mode = (structure_mode or 'classic').strip().lower()
-        topics_mode = structure_mode in ('topics', 'topic')
-        include_notes = not topics_mode
+        content = params.content
+        style = params.style
+        slide_count_int = params.slide_count
+        title = params.title
 
-        try:
-            slide_count_int = int(slide_count)
-        except Exception:
-            slide_count_int = 10
-        
-        print(f'[{request_id}] PDF ENHANCED Request: slide_count={slide_count}, style={style}')
+        structure_mode = params.structure_mode
+        topics_mode = params.topics_mode
+        include_notes = not topics_mode
         
-        if not content or len(content) < 100:
-            return jsonify({'error': 'Content too short'}), 400
+        log.info('[%s] PDF ENHANCED Request: slide_count=%s, style=%s', request_id, slide_count_int, style)
         
         all_web_results = []
         search_queries = []
 
         if topics_mode:
-            print(f'[{request_id}] Topics mode: skipping web enrichment; using topic structure')
+            log.info('[%s] Topics mode: skipping web enrichment; using topic structure', request_id)
             slides = generate_topic_slide_structure(content, slide_count_int, style)
             for s in slides:
                 if isinstance(s, dict):
                     s.pop('speaker_notes', None)
         else:
             # Step 1: Extract search queries
-            print(f'[{request_id}] Step 1: Extracting search queries...')
+            log.info('[%s] Step 1: Extracting search queries...', request_id)
             search_queries = extract_search_queries_from_content(content, slide_count_int)
 
             # Step 2: Perform web searches
-            print(f'[{request_id}] Step 2: Searching web...')
-            for query in search_queries[:5]:
-                results = search_web_for_topic(query, max_results=3)
-                all_web_results.extend(results)
-                time.sleep(0.5)
+            log.info('[%s] Step 2: Searching web...', request_id)
+            all_web_results = search_web_for_queries(search_queries[:5], max_results=3)
 
             # Step 3: Generate enhanced structure
-            print(f'[{request_id}] Step 3: Generating enhanced structure...')
+            log.info('[%s] Step 3: Generating enhanced structure...', request_id)
             slides = generate_enhanced_slide_structure(content, slide_count_int, style, all_web_results)
 
             # Ensure professional opening and closing
@@ -2014,16 +2761,13 @@ def generate_pdf_enhanced_presentation():
                 })
         
         # Generate PDF
-        pdf_bytes = create_pdf_presentation(slides, style, include_notes=include_notes)
-        
-        # Save to temp file
-        filename = f'presentation_{request_id}.pdf'
-        filepath = os.path.join(tempfile.gettempdir(), filename)
-        with open(filepath, 'wb') as f:
-            f.write(pdf_bytes)
+        # Build straight into the temp file served by /download-pdf
+        sweep_expired_results()
+        filename, filepath = result_path(request_id, 'pdf')
+        write_pdf_presentation(filepath, slides, style, include_notes=include_notes)
         
         duration = round(time.time() - start_time, 2)
-        print(f'[{request_id}] Enhanced PDF created in {duration}s')
+        log.info('[%s] Enhanced PDF created in %ss', request_id, duration)
         
         return jsonify({
             'success': True,
@@ -2042,7 +2786,7 @@ def generate_pdf_enhanced_presentation():
         })
         
     except Exception as e:
-        print(f'[{request_id}] PDF Enhanced Error: {e}')
+        log.error('[%s] PDF Enhanced Error: %s', request_id, e)
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e), 'request_id': request_id}), 500
@@ -2051,23 +2795,20 @@ def generate_pdf_enhanced_presentation():
 def download_pdf(request_id: str):
     """Download generated PDF presentation"""
     
-    filename = f'presentation_{request_id}.pdf'
-    filepath = os.path.join(tempfile.gettempdir(), filename)
+    filename, filepath = result_path(request_id, 'pdf')
     
     if not os.path.exists(filepath):
         return jsonify({'error': 'PDF not found or expired'}), 404
     
-    return send_file(
-        filepath,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_result(filepath, 'application/pdf', filename)
 
 # =============================================================================
 # RUN SERVER
 # =============================================================================
 
 if __name__ == '__main__':
+    # Production runs under gunicorn (see Dockerfile); the Werkzeug server is opt-in for local use
+    if not os.environ.get('USE_DEV_SERVER'):
+        raise SystemExit('Run with gunicorn (see Dockerfile), or set USE_DEV_SERVER=1 for the Flask dev server')
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -1,87 +1,191 @@
 #!/usr/bin/env python3
 """Test PDF text extraction methods"""
+import argparse
+import binascii
+import mmap
+import multiprocessing
+import os
 import re
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
-pdf_path = "/Users/ahmednabhan/Downloads/CCNA_S_1.pdf"
-
-# Read PDF file
-with open(pdf_path, 'rb') as f:
-    content = f.read()[:20*1024*1024]  # Read first 20MB
-
-binary_str = content.decode('latin-1')
-print(f'Read {len(content)} bytes ({len(content)/(1024*1024):.1f} MB)')
-
-# Method 1: Standard parentheses text
-paren_texts = []
-in_text = False
-current = ''
-for char in binary_str[:5000000]:  # First 5MB
-    if char == '(':
-        in_text = True
-        current = ''
-    elif char == ')' and in_text:
-        in_text = False
-        readable = ''.join(c for c in current if 32 <= ord(c) <= 126)
-        if len(readable) > 1 and re.search(r'[a-zA-Z]', readable):
-            paren_texts.append(readable)
-    elif in_text:
-        current += char
-
-print(f'\nMethod 1 (parentheses): Found {len(paren_texts)} text fragments')
-print('Sample:', paren_texts[:10] if paren_texts else 'None')
-
-# Method 2: Hex-encoded text
-hex_matches = re.findall(r'<[0-9A-Fa-f]{8,}>', binary_str)
-print(f'\nMethod 2 (hex): Found {len(hex_matches)} hex blocks')
-
-decoded_hex = []
-for h in hex_matches[:200]:
-    hex_data = h[1:-1]
-    decoded = ''
-    for i in range(0, len(hex_data)-3, 4):
-        try:
-            code = int(hex_data[i:i+4], 16)
-            if 32 <= code <= 126:
-                decoded += chr(code)
-            elif 0x20 <= code <= 0xFFFF:
-                ch = chr(code)
-                if ch.isalnum() or ch in ' .,':
-                    decoded += ch
-        except:
-            pass
-    if len(decoded) > 2 and re.search(r'[a-zA-Z]{2,}', decoded):
-        decoded_hex.append(decoded)
-
-print(f'Decoded {len(decoded_hex)} text fragments')
-print('Sample:', decoded_hex[:10] if decoded_hex else 'None')
-
-# Method 3: BT/ET blocks with Tj
-bt_matches = re.findall(r'BT[\s\S]{1,2000}?ET', binary_str[:5000000])
-print(f'\nMethod 3 (BT/ET blocks): Found {len(bt_matches)} blocks')
-
-tj_texts = []
-for block in bt_matches[:100]:
-    tjs = re.findall(r'\(([^)]{1,200})\)\s*Tj', block)
-    for tj in tjs:
-        clean = ''.join(c for c in tj if 32 <= ord(c) <= 126)
-        if clean and re.search(r'[a-zA-Z]', clean):
-            tj_texts.append(clean)
-
-print(f'Extracted {len(tj_texts)} Tj texts')
-print('Sample:', tj_texts[:10] if tj_texts else 'None')
-
-# Method 4: Word sequences
-words = re.findall(r'[A-Za-z][a-z]{2,15}(?:\s+[A-Za-z][a-z]{2,15}){2,}', binary_str[:5000000])
-print(f'\nMethod 4 (word sequences): Found {len(words)} sequences')
-print('Sample:', words[:5] if words else 'None')
-
-# Total extraction
-all_text = ' '.join(paren_texts + decoded_hex + tj_texts + words)
-print(f'\nTotal extracted: {len(all_text)} characters')
-print(f'Unique words: {len(set(all_text.split()))}')
-
-# Show some actual content
-if all_text:
-    print('\n--- Sample Content (first 1000 chars) ---')
-    print(all_text[:1000])
+# The scanning patterns use possessive quantifiers (*+, {m,n}+): each run is
+# followed by a character it can't contain, so giving characters back could
+# never produce a match and the engine is told not to try.
+# Innermost (...) string, the same span the old char-by-char scan captured
+PAREN_RE = re.compile(rb'\(([^()]*+)\)')
+HAS_ALPHA = re.compile(rb'[a-zA-Z]')
+HEX_RE = re.compile(rb'<([0-9A-Fa-f]{8,}+)>')
+TJ_RE = re.compile(rb'\(([^)]{1,200}+)\)\s*+Tj')
+# A long lowercase run fails once per start instead of retrying 14 shorter
+# lengths; a shorter word would always be followed by a letter anyway
+WORDS_RE = re.compile(rb'[A-Za-z][a-z]{2,15}+(?:\s++[A-Za-z][a-z]{2,15}+){2,}')
+# Decoded hex fragments are str, so this one is a str pattern
+HAS_WORD = re.compile(r'[a-zA-Z]{2,}')
+# Everything outside printable ASCII, for bytes.translate() to drop
+NON_PRINTABLE = bytes(b for b in range(256) if not 32 <= b <= 126)
+# What each UTF-16 unit of a hex string contributes: printable ASCII and
+# non-ASCII letters/digits are kept, anything else (lone surrogates included)
+# becomes ''
+HEX_UNIT_TEXT = [chr(c) if 32 <= c <= 126 or (c > 126 and chr(c).isalnum()) else '' for c in range(0x10000)]
+
+
+def bt_regions(buf, limit, max_len=2000):
+    """Yield (start, end) of each BT ... ET text object that ends within buf[:limit]
+
+    A text object is a BT followed by the first ET 1-2000 bytes later.
+    bytes.find() jumps from one marker to the next, so the graphics operators
+    between text objects are never looked at byte by byte.
+    """
+    pos = 0
+    while True:
+        start = buf.find(b'BT', pos, limit)
+        if start == -1:
+            return
+        end = buf.find(b'ET', start + 3, min(start + max_len + 4, limit))
+        if end == -1:
+            pos = start + 1
+            continue
+        yield start, end + 2
+        pos = end + 2
+
+
+PDF_PATH = "/Users/ahmednabhan/Downloads/CCNA_S_1.pdf"
+
+
+def paren_texts_in(content, text_regions):
+    """Method 1: printable text of the (...) strings inside text objects"""
+    readable = (
+        m.translate(None, NON_PRINTABLE)
+        for start, end in text_regions
+        for m in PAREN_RE.findall(content, start, end)
+    )
+    return [r.decode('ascii') for r in readable if len(r) > 1 and HAS_ALPHA.search(r)]
+
+
+def hex_texts_in(content):
+    """Method 2: (number of <hex> blocks, the ones that decode to text)"""
+    # Blocks are decoded as the scan finds them rather than collected first
+    hex_blocks = 0
+    decoded_hex = []
+    for match in HEX_RE.finditer(content):
+        hex_blocks += 1
+        hex_data = match.group(1)
+        # Whole 4-digit units only; the hex is big-endian UTF-16
+        units = array('H', binascii.unhexlify(hex_data[:len(hex_data) - len(hex_data) % 4]))
+        if sys.byteorder == 'little':
+            units.byteswap()
+        decoded = ''.join(map(HEX_UNIT_TEXT.__getitem__, units))
+        if len(decoded) > 2 and HAS_WORD.search(decoded):
+            decoded_hex.append(decoded)
+    return hex_blocks, decoded_hex
+
+
+def tj_texts_in(content, text_regions):
+    """Method 3: strings shown with Tj in the first 100 text objects"""
+    tj_texts = []
+    for start, end in text_regions[:100]:
+        tjs = TJ_RE.findall(content, start, end)
+        for tj in tjs:
+            clean = tj.translate(None, NON_PRINTABLE)
+            if clean and HAS_ALPHA.search(clean):
+                tj_texts.append(clean.decode('ascii'))
+    return tj_texts
+
+
+def word_sequences_in(content):
+    """Method 4: runs of three or more word-like tokens in the first 5MB"""
+    return [w.decode('latin-1') for w in WORDS_RE.findall(content, 0, 5000000)]
+
+
+# The mapped PDF, set before the pool forks so every worker inherits the
+# mapping instead of having 20MB pickled across to it
+_content = b''
+
+
+def _run_method(method, *args):
+    return method(_content, *args)
+
+
+def main(pdf_path=PDF_PATH, verbose=False):
+    """Run every extraction method on pdf_path and print the totals
+
+    With verbose, also print each method's counts and samples.
+    """
+    global _content
+
+    # Map the first 20MB rather than copying it onto the heap: pages are read in
+    # as the scans reach them and stay reclaimable page cache
+    with open(pdf_path, 'rb') as f:
+        size = min(os.fstat(f.fileno()).st_size, 20*1024*1024)
+        content = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else b''
+
+    if verbose:
+        print(f'Read {len(content)} bytes ({len(content)/(1024*1024):.1f} MB)')
+
+    # Text objects in the first 5MB; Methods 1 and 3 only look inside these
+    text_regions = list(bt_regions(content, 5000000))
+
+    # The four methods share nothing, so each gets its own process where fork
+    # is available (Linux, macOS) and they run one after another elsewhere
+    _content = content
+    jobs = [
+        (paren_texts_in, text_regions),
+        (hex_texts_in,),
+        (tj_texts_in, text_regions),
+        (word_sequences_in,),
+    ]
+    if 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(len(jobs), mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = [pool.submit(_run_method, *job) for job in jobs]
+            results = [future.result() for future in futures]
+    else:
+        results = [_run_method(*job) for job in jobs]
+    paren_texts, (hex_blocks, decoded_hex), tj_texts, words = results
+
+    if verbose:
+        print(f'\nMethod 1 (parentheses): Found {len(paren_texts)} text fragments')
+        print('Sample:', paren_texts[:10] if paren_texts else 'None')
+
+        print(f'\nMethod 2 (hex): Found {hex_blocks} hex blocks')
+        print(f'Decoded {len(decoded_hex)} text fragments')
+        print('Sample:', decoded_hex[:10] if decoded_hex else 'None')
+
+        print(f'\nMethod 3 (BT/ET blocks): Found {len(text_regions)} blocks')
+        print(f'Extracted {len(tj_texts)} Tj texts')
+        print('Sample:', tj_texts[:10] if tj_texts else 'None')
+
+        print(f'\nMethod 4 (word sequences): Found {len(words)} sequences')
+        print('Sample:', words[:5] if words else 'None')
+
+    # Total extraction, counted without joining everything into one string;
+    # repeated fragments (headers, footers) are only split into words once
+    fragments = paren_texts + decoded_hex + tj_texts + words
+    total_chars = sum(map(len, fragments)) + max(len(fragments) - 1, 0)
+    unique_words = set()
+    for fragment in set(fragments):
+        unique_words.update(fragment.split())
+    if verbose:
+        print()
+    print(f'Total extracted: {total_chars} characters')
+    print(f'Unique words: {len(unique_words)}')
+
+    # Show some actual content
+    if verbose and fragments:
+        sample, size = [], 0
+        for fragment in fragments:
+            if size >= 1000:
+                break
+            sample.append(fragment)
+            size += len(fragment) + 1
+        print('\n--- Sample Content (first 1000 chars) ---')
+        print(' '.join(sample)[:1000])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdf_path', nargs='?', default=PDF_PATH)
+    parser.add_argument('--verbose', action='store_true', help='print per-method counts and samples')
+    args = parser.parse_args()
+    main(args.pdf_path, args.verbose)